@@ -0,0 +1,17 @@
+"""Benchmarks for OMGL hot paths.
+
+Run with a headless context, optionally comparing against a baseline::
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json --threshold 0.1
+
+The benchmark modules import OpenGL, so they must be imported after a
+platform has been selected with omgl.context.use_platform.
+"""
+modules = [
+    'benchmarks.bench_objects',
+    'benchmarks.bench_buffers',
+    'benchmarks.bench_shaders',
+    'benchmarks.bench_textures',
+    'benchmarks.bench_mesh',
+]
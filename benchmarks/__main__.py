@@ -0,0 +1,48 @@
+from __future__ import absolute_import, print_function
+import argparse
+import importlib
+import sys
+from omgl import context
+from . import modules
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark OMGL hot paths')
+    parser.add_argument('--platform', choices=context.platforms, default='egl')
+    parser.add_argument('--gl-version', default='4.5', help='OpenGL version to request, eg. 3.3')
+    parser.add_argument('--filter', help='only run benchmarks containing this string')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05, help='minimum seconds per repeat')
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--baseline', help='compare the results against a saved JSON file')
+    parser.add_argument('--threshold', type=float, default=0.1, help='ratio of slowdown counted as a regression')
+    args = parser.parse_args(args)
+
+    # must happen before OpenGL is imported
+    context.use_platform(args.platform)
+    version = tuple(int(v) for v in args.gl_version.split('.'))
+    ctx = context.Context(version=version, platform=args.platform)
+
+    from OpenGL import GL
+    from . import harness
+    for module in modules:
+        importlib.import_module(module)
+
+    results = harness.run(filter=args.filter, repeat=args.repeat, min_time=args.min_time, finish=GL.glFinish)
+
+    if args.output:
+        harness.save(args.output, results, harness.metadata())
+
+    if args.baseline:
+        baseline = harness.load(args.baseline)['results']
+        rows, regressions = harness.compare(results, baseline, threshold=args.threshold)
+        print()
+        print(harness.format_comparison(rows, regressions))
+        if regressions:
+            print('{} regressions'.format(len(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,25 @@
+from __future__ import absolute_import
+import numpy as np
+from omgl.buffer import VertexBuffer
+from .harness import benchmark
+
+sizes = [1 << 10, 1 << 16, 1 << 20, 1 << 24]
+
+
+@benchmark('buffer.set_data', size=sizes)
+def set_data(size):
+    buffer = VertexBuffer(shape=(size,), dtype=np.uint8)
+    data = np.random.randint(0, 255, size).astype(np.uint8)
+
+    def run():
+        buffer.set_data(data)
+    return run
+
+
+@benchmark('buffer.get_data', size=sizes)
+def get_data(size):
+    buffer = VertexBuffer(np.random.randint(0, 255, size).astype(np.uint8))
+
+    def run():
+        buffer.get_data()
+    return run
@@ -0,0 +1,24 @@
+from __future__ import absolute_import
+import numpy as np
+from omgl.buffer import VertexBuffer
+from omgl.mesh import Mesh
+from omgl.pipeline import Pipeline
+from omgl.texture import Texture2D
+from .harness import benchmark
+from .common import create_program, create_vertices
+
+
+@benchmark('mesh.render', meshes=[1, 10, 100])
+def render(meshes):
+    program = create_program()
+    texture = Texture2D(np.zeros((4,4,4), dtype=np.uint8))
+    pipeline = Pipeline(program, in_diffuse_texture=texture)
+    buffers = [VertexBuffer(create_vertices(36)) for _ in range(meshes)]
+    objects = [Mesh(pipeline, **buffer.pointers) for buffer in buffers]
+    projection = np.eye(4, dtype=np.float32)
+    model_view = np.eye(4, dtype=np.float32)
+
+    def run():
+        for mesh in objects:
+            mesh.render(in_projection=projection, in_model_view=model_view)
+    return run
@@ -0,0 +1,33 @@
+from __future__ import absolute_import
+import numpy as np
+from omgl.buffer import VertexBuffer, VertexArray
+from omgl.texture import Texture2D
+from .harness import benchmark
+
+
+@benchmark('object.create', type=['VertexBuffer', 'Texture2D', 'VertexArray'])
+def create(type):
+    create = {
+        'VertexBuffer': lambda: VertexBuffer(shape=(1024,), dtype=np.float32),
+        'Texture2D': lambda: Texture2D(shape=(16,16,4), dtype=np.uint8, mipmap=False),
+        'VertexArray': lambda: VertexArray(),
+    }[type]
+
+    def run():
+        # the object is deleted when it is released
+        create()
+    return run
+
+
+@benchmark('object.bind', type=['VertexBuffer', 'Texture2D', 'VertexArray'])
+def bind(type):
+    obj = {
+        'VertexBuffer': lambda: VertexBuffer(shape=(1024,), dtype=np.float32),
+        'Texture2D': lambda: Texture2D(shape=(16,16,4), dtype=np.uint8, mipmap=False),
+        'VertexArray': lambda: VertexArray(),
+    }[type]()
+
+    def run():
+        obj.bind()
+        obj.unbind()
+    return run
@@ -0,0 +1,50 @@
+from __future__ import absolute_import
+import numpy as np
+from omgl.shader import VertexShader, FragmentShader, Program
+from omgl.texture import Texture2D
+from .harness import benchmark
+from .common import vertex_source, fragment_source, create_program
+
+
+@benchmark('shader.compile')
+def compile():
+    def run():
+        VertexShader(vertex_source)
+        FragmentShader(fragment_source)
+    return run
+
+
+@benchmark('shader.link')
+def link():
+    shaders = [VertexShader(vertex_source), FragmentShader(fragment_source)]
+
+    def run():
+        Program(shaders)
+    return run
+
+
+@benchmark('uniform.set', type=['mat4', 'sampler'])
+def uniform_set(type):
+    program = create_program()
+    name, value = {
+        'mat4': ('in_projection', np.eye(4, dtype=np.float32)),
+        'sampler': ('in_diffuse_texture', 0),
+    }[type]
+    uniform = program.uniforms[name]
+
+    def run():
+        uniform.data = value
+    return run
+
+
+@benchmark('proxy.get', property=['program.active_uniforms', 'texture.min_filter', 'texture.swizzle'])
+def proxy_get(property):
+    obj = {
+        'program': create_program,
+        'texture': lambda: Texture2D(shape=(16,16,4), dtype=np.uint8, mipmap=False),
+    }[property.split('.')[0]]()
+    name = property.split('.')[1]
+
+    def run():
+        getattr(obj, name)
+    return run
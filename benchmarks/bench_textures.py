@@ -0,0 +1,37 @@
+from __future__ import absolute_import
+import numpy as np
+from omgl.texture import Texture2D
+from omgl.buffer import TextureStreamer
+from .harness import benchmark
+
+sizes = [64, 256, 1024]
+
+
+@benchmark('texture.create', size=sizes, mipmap=[False, True])
+def create(size, mipmap):
+    data = np.random.randint(0, 255, (size, size, 4)).astype(np.uint8)
+
+    def run():
+        Texture2D(data, mipmap=mipmap)
+    return run
+
+
+@benchmark('texture.set_data', size=sizes)
+def set_data(size):
+    data = np.random.randint(0, 255, (size, size, 4)).astype(np.uint8)
+    texture = Texture2D(shape=data.shape, dtype=data.dtype, mipmap=False)
+
+    def run():
+        texture.set_data(data)
+    return run
+
+
+@benchmark('texture.stream', size=sizes)
+def stream(size):
+    data = np.random.randint(0, 255, (size, size, 4)).astype(np.uint8)
+    texture = Texture2D(shape=data.shape, dtype=data.dtype, mipmap=False)
+    streamer = TextureStreamer(texture, count=3)
+
+    def run():
+        streamer.upload(data)
+    return run
@@ -0,0 +1,39 @@
+from __future__ import absolute_import
+import numpy as np
+from omgl.shader import VertexShader, FragmentShader, Program
+
+vertex_source = """
+#version 330
+in vec3 in_position;
+in vec2 in_uv;
+uniform mat4 in_projection;
+uniform mat4 in_model_view;
+out vec2 ex_uv;
+void main() {
+    gl_Position = in_projection * in_model_view * vec4(in_position, 1.0);
+    ex_uv = in_uv;
+}
+"""
+
+fragment_source = """
+#version 330
+uniform sampler2D in_diffuse_texture;
+in vec2 ex_uv;
+out vec4 out_color;
+void main() {
+    out_color = texture(in_diffuse_texture, ex_uv);
+}
+"""
+
+vertex_dtype = np.dtype([('in_position', np.float32, 3), ('in_uv', np.float32, 2)])
+
+
+def create_program():
+    return Program([VertexShader(vertex_source), FragmentShader(fragment_source)])
+
+
+def create_vertices(count):
+    data = np.zeros(count, dtype=vertex_dtype)
+    data['in_position'] = np.random.random((count, 3))
+    data['in_uv'] = np.random.random((count, 2))
+    return data
@@ -0,0 +1,157 @@
+from __future__ import absolute_import, print_function
+import itertools
+import json
+import platform
+import sys
+import timeit
+
+_benchmarks = []
+
+
+def benchmark(name, **parameters):
+    """Registers a benchmark.
+
+    The decorated function performs any setup and returns a function that
+    runs the operation once.
+    Each keyword is a list of parameter values, the benchmark is run for
+    every combination::
+
+        @benchmark('buffer.set_data', size=[1024, 65536])
+        def set_data(size):
+            buffer = VertexBuffer(shape=(size,), dtype=np.uint8)
+            data = np.zeros(size, dtype=np.uint8)
+            return lambda: buffer.set_data(data)
+    """
+    def decorator(func):
+        _benchmarks.append((name, func, parameters))
+        return func
+    return decorator
+
+
+def benchmarks():
+    """Returns a list of (key, setup function, parameters) for all benchmarks.
+    """
+    result = []
+    for name, func, parameters in _benchmarks:
+        names = sorted(parameters.keys())
+        for values in itertools.product(*[parameters[key] for key in names]):
+            kwargs = dict(zip(names, values))
+            key = name
+            if kwargs:
+                key += '[{}]'.format(','.join('{}={}'.format(k, kwargs[k]) for k in names))
+            result.append((key, func, kwargs))
+    return result
+
+
+def measure(func, repeat=5, min_time=0.05, finish=None):
+    """Times func, returning the seconds per call of each repeat.
+
+    The number of calls per repeat is increased until a repeat takes at least
+    min_time. finish is called at the end of each repeat so queued GPU work
+    is included in the time.
+    """
+    number = 1
+    while True:
+        time = _time(func, number, finish)
+        if time >= min_time or number >= 1 << 20:
+            break
+        number *= max(2, min(10, int(min_time / max(time, 1e-9))))
+
+    times = [_time(func, number, finish) / number for _ in range(repeat)]
+    return times, number
+
+
+def _time(func, number, finish):
+    timer = timeit.default_timer
+    start = timer()
+    for _ in range(number):
+        func()
+    if finish:
+        finish()
+    return timer() - start
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.
+
+
+def run(filter=None, repeat=5, min_time=0.05, finish=None, verbose=True):
+    """Runs the registered benchmarks whose key contains filter.
+
+    Returns a dict of key: statistics, times are seconds per call.
+    """
+    results = {}
+    for key, func, kwargs in benchmarks():
+        if filter and filter not in key:
+            continue
+
+        operation = func(**kwargs)
+        times, number = measure(operation, repeat=repeat, min_time=min_time, finish=finish)
+        results[key] = {
+            'min': min(times),
+            'median': _median(times),
+            'mean': sum(times) / len(times),
+            'max': max(times),
+            'number': number,
+            'repeat': repeat,
+        }
+        # release any GL objects before the next benchmark
+        del operation
+
+        if verbose:
+            print('{:<50} {:>12.3f}us'.format(key, results[key]['median'] * 1e6))
+    return results
+
+
+def metadata():
+    from OpenGL import GL
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'gl_version': GL.glGetString(GL.GL_VERSION).decode('ascii', 'replace'),
+        'gl_renderer': GL.glGetString(GL.GL_RENDERER).decode('ascii', 'replace'),
+    }
+
+
+def save(filename, results, meta=None):
+    with open(filename, 'w') as f:
+        json.dump({'meta': meta or {}, 'results': results}, f, indent=2, sort_keys=True)
+
+
+def load(filename):
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.1):
+    """Compares median times against a baseline.
+
+    Returns a list of (key, baseline, current, ratio) for each benchmark in both,
+    and a list of the keys that are slower than the baseline by more than threshold.
+    """
+    rows = []
+    regressions = []
+    for key in sorted(results.keys()):
+        if key not in baseline:
+            continue
+        before = baseline[key]['median']
+        after = results[key]['median']
+        ratio = after / before if before else float('inf')
+        rows.append((key, before, after, ratio))
+        if ratio > 1. + threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def format_comparison(rows, regressions):
+    lines = ['{:<50} {:>12} {:>12} {:>8}'.format('benchmark', 'baseline', 'current', 'ratio')]
+    for key, before, after, ratio in rows:
+        lines.append('{:<50} {:>10.3f}us {:>10.3f}us {:>7.2f}x{}'.format(
+            key, before * 1e6, after * 1e6, ratio,
+            ' REGRESSION' if key in regressions else '',
+        ))
+    return '\n'.join(lines)
@@ -4,3 +4,6 @@ from __future__ import absolute_import, print_function
 from .buffer import *
 from .buffer_pointer import *
 from .vertex_array import *
+from .layout import *
+from .streaming import *
+from .readback import *
@@ -8,16 +8,20 @@ from ..object import ManagedObject, BindableObject
 from .buffer_pointer import BufferPointer
 from ..texture.texture import BufferTexture
 from .. import dtypes
+from .. import features
+from ..counters import counters
 
 
 class Buffer(BindableObject, ManagedObject):
     _create_func = GL.glGenBuffers
+    _dsa_create_func = GL.glCreateBuffers
     _delete_func = GL.glDeleteBuffers
     _bind_func = GL.glBindBuffer
+    _label_identifier = GL.GL_BUFFER
     _target = None
     _usage = GL.GL_STATIC_DRAW
 
-    def __init__(self, data=None, shape=None, dtype=None, buffer=None, offset=0, usage=None):
+    def __init__(self, data=None, shape=None, dtype=None, buffer=None, offset=0, usage=None, flags=None, label=None):
         super(Buffer, self).__init__(handle=buffer.handle if buffer else None)
         if data is not None:
             data = np.array(data, dtype=dtype)
@@ -34,31 +38,67 @@ class Buffer(BindableObject, ManagedObject):
 
         self._offset = offset
         self._usage = usage or self._usage
+        self._flags = None
         self._mapped_buffer = None
 
         if not self._nbytes:
             raise ValueError('Invalid parameters')
 
         if not buffer:
-            with self:
-                GL.glBufferData(self._target, self._nbytes, data, self._usage)
+            if flags is not None and features.buffer_storage:
+                self._allocate_storage(data, flags)
+            elif features.direct_state_access:
+                GL.glNamedBufferData(self._handle, self._nbytes, data, self._usage)
+            else:
+                with self:
+                    GL.glBufferData(self._target, self._nbytes, data, self._usage)
+
+            if counters.enabled and data is not None:
+                counters.add('bytes_uploaded', self._nbytes, label=self.__class__.__name__)
         elif data is not None:
             self.set_data(data)
 
+        if label:
+            self.label = label
+
+    def _allocate_storage(self, data, flags):
+        # GL 4.4
+        # immutable storage, which is required for persistent mapping
+        if features.direct_state_access:
+            GL.glNamedBufferStorage(self._handle, self._nbytes, data, flags)
+        else:
+            with self:
+                GL.glBufferStorage(self._target, self._nbytes, data, flags)
+        self._flags = flags
+
     def get_data(self, offset=0, nbytes=None):
         nbytes = nbytes or (self._nbytes - offset)
         offset = offset + self._offset
 
-        with self:
-            data = GL.glGetBufferSubData(self._target, offset, nbytes)
+        if features.direct_state_access:
+            data = np.empty(nbytes, dtype=np.uint8)
+            GL.glGetNamedBufferSubData(self._handle, offset, nbytes, data)
+        else:
+            with self:
+                data = GL.glGetBufferSubData(self._target, offset, nbytes)
+
+        if counters.enabled:
+            counters.add('bytes_read', nbytes, label=self.__class__.__name__)
+
         data = data.view(dtype=self._dtype)
         data.shape = self._shape
         return data
 
     def set_data(self, data, offset=0):
         offset = offset + self._offset
-        with self:
-            GL.glBufferSubData(self._target, offset, data.nbytes, data)
+        if features.direct_state_access:
+            GL.glNamedBufferSubData(self._handle, offset, data.nbytes, data)
+        else:
+            with self:
+                GL.glBufferSubData(self._target, offset, data.nbytes, data)
+
+        if counters.enabled:
+            counters.add('bytes_uploaded', data.nbytes, label=self.__class__.__name__)
 
     def _ptr_to_np(self, ptr, access):
         func = ctypes.pythonapi.PyBuffer_FromMemory
@@ -75,18 +115,55 @@ class Buffer(BindableObject, ManagedObject):
         if self._mapped_buffer is not None:
             raise ValueError('Buffer is already mapped')
 
-        with self:
-            ptr = GL.glMapBuffer(self._target, access)
+        if features.direct_state_access:
+            ptr = GL.glMapNamedBuffer(self._handle, access)
+        else:
+            with self:
+                ptr = GL.glMapBuffer(self._target, access)
 
         self._mapped_buffer = self._ptr_to_np(ptr, access)
         return self._mapped_buffer
 
+    def map_range(self, offset=0, nbytes=None, access=GL.GL_MAP_READ_BIT | GL.GL_MAP_WRITE_BIT):
+        """Maps nbytes of the buffer from offset, returning an array of bytes.
+
+        Access is a combination of GL_MAP_*_BIT flags.
+        Persistent mappings require the buffer to be created with
+        storage flags that include GL_MAP_PERSISTENT_BIT.
+        """
+        if self._mapped_buffer is not None:
+            raise ValueError('Buffer is already mapped')
+
+        nbytes = nbytes or (self._nbytes - offset)
+        offset = offset + self._offset
+
+        if features.direct_state_access:
+            ptr = GL.glMapNamedBufferRange(self._handle, offset, nbytes, access)
+        else:
+            with self:
+                ptr = GL.glMapBufferRange(self._target, offset, nbytes, access)
+
+        if not ptr:
+            raise ValueError('Unable to map buffer')
+
+        if access & GL.GL_MAP_READ_BIT:
+            mode = GL.GL_READ_WRITE if access & GL.GL_MAP_WRITE_BIT else GL.GL_READ_ONLY
+        else:
+            mode = GL.GL_WRITE_ONLY
+
+        buf = np.frombuffer(int_asbuffer(ptr, nbytes), np.uint8)
+        self._mapped_buffer = MappedBuffer(buf, access=mode)
+        return self._mapped_buffer
+
     def unmap(self):
         if self._mapped_buffer is None:
             raise ValueError('Buffer not mapped')
 
-        with self:
-            GL.glUnmapBuffer(self._target)
+        if features.direct_state_access:
+            GL.glUnmapNamedBuffer(self._handle)
+        else:
+            with self:
+                GL.glUnmapBuffer(self._target)
 
         self._mapped_buffer = None
 
@@ -106,6 +183,12 @@ class Buffer(BindableObject, ManagedObject):
     def usage(self):
         return self._usage
 
+    @property
+    def flags(self):
+        """The immutable storage flags, or None if the storage is mutable.
+        """
+        return self._flags
+
     @property
     def dtype(self):
         return self._dtype
@@ -192,8 +275,8 @@ class UniformBufferMixin(object):
 class ArrayBuffer(ArrayBufferMixin, Buffer):
     # TODO: add a bind method that binds the current buffer based on dtype size
     # TODO: add a bind method that binds sub-sections of the buffer based on complex dtypes
-    def __init__(self, data=None, shape=None, dtype=None, buffer=None, offset=0, usage=None):
-        super(ArrayBuffer, self).__init__(data=data, shape=shape, dtype=dtype, buffer=buffer, offset=offset, usage=usage)
+    def __init__(self, data=None, shape=None, dtype=None, buffer=None, offset=0, usage=None, flags=None, label=None):
+        super(ArrayBuffer, self).__init__(data=data, shape=shape, dtype=dtype, buffer=buffer, offset=offset, usage=usage, flags=flags, label=label)
 
         # create a list of pointers
         dtype = np.dtype(self._dtype)
@@ -212,15 +295,72 @@ class ArrayBuffer(ArrayBufferMixin, Buffer):
         return copy(self._pointers)
 
 class ElementBuffer(ElementBufferMixin, Buffer):
-    def render(self, primitive=GL.GL_TRIANGLES, start=None, count=None):
-        count = count or self.size
+    def __init__(self, data=None, shape=None, dtype=None, buffer=None, offset=0, usage=None, primitive_restart=False, restart_index=None, label=None):
+        super(ElementBuffer, self).__init__(data=data, shape=shape, dtype=dtype, buffer=buffer, offset=offset, usage=usage, label=label)
+
+        # by default, restart on the largest value of the index type
+        self.primitive_restart = primitive_restart
+        self.restart_index = restart_index if restart_index is not None else np.iinfo(self._dtype).max
+
+    def _begin_restart(self):
+        if self.primitive_restart:
+            GL.glEnable(GL.GL_PRIMITIVE_RESTART)
+            GL.glPrimitiveRestartIndex(self.restart_index)
+
+    def _end_restart(self):
+        if self.primitive_restart:
+            GL.glDisable(GL.GL_PRIMITIVE_RESTART)
+
+    def render(self, primitive=GL.GL_TRIANGLES, start=None, count=None, base_vertex=None, instances=None):
+        start = start or 0
+        count = count or (self.size - start)
         dtype = dtypes.for_dtype(self.dtype)
         gl_enum = dtype.gl_enum
-        offset = (start or 0) * np.dtype(dtype.dtype).itemsize
+        offset = start * np.dtype(dtype.dtype).itemsize
         # convert to ctypes void pointer
         offset = ctypes.c_void_p(offset)
         with self:
-            GL.glDrawElements(primitive, count, gl_enum, offset)
+            self._begin_restart()
+            if instances is not None:
+                if base_vertex:
+                    # GL 3.2
+                    GL.glDrawElementsInstancedBaseVertex(primitive, count, gl_enum, offset, instances, base_vertex)
+                else:
+                    GL.glDrawElementsInstanced(primitive, count, gl_enum, offset, instances)
+            elif base_vertex:
+                # GL 3.2
+                GL.glDrawElementsBaseVertex(primitive, count, gl_enum, offset, base_vertex)
+            else:
+                GL.glDrawElements(primitive, count, gl_enum, offset)
+            self._end_restart()
+
+        if counters.enabled:
+            counters.draw(count, instances)
+
+    def render_ranges(self, starts, counts, primitive=GL.GL_TRIANGLES, base_vertices=None):
+        """Renders multiple ranges of indices with a single draw call.
+
+        Starts and counts are sequences (or numpy arrays) of the first
+        index and number of indices of each range.
+        Base vertices are optionally added to each index of the matching range.
+        """
+        counts = np.ascontiguousarray(counts, dtype=np.int32)
+        dtype = dtypes.for_dtype(self.dtype)
+        gl_enum = dtype.gl_enum
+        # glMultiDrawElements takes an array of byte offsets
+        offsets = np.asarray(starts, dtype=np.uintp) * np.dtype(dtype.dtype).itemsize
+        with self:
+            self._begin_restart()
+            if base_vertices is not None:
+                # GL 3.2
+                base_vertices = np.ascontiguousarray(base_vertices, dtype=np.int32)
+                GL.glMultiDrawElementsBaseVertex(primitive, counts, gl_enum, offsets, len(counts), base_vertices)
+            else:
+                GL.glMultiDrawElements(primitive, counts, gl_enum, offsets, len(counts))
+            self._end_restart()
+
+        if counters.enabled:
+            counters.draw(int(counts.sum()), calls=len(counts))
 
 class AtomicCounterBuffer(AtomicCounterBufferMixin, Buffer):
     pass
@@ -241,8 +381,8 @@ class PixelUnpackBuffer(PixelUnpackBufferMixin, Buffer):
     pass
 
 class TextureBuffer(TextureBufferMixin, Buffer):
-    def __init__(self, data=None, shape=None, dtype=None, buffer=None, offset=0, usage=None, internal_format=None):
-        super(TextureBuffer, self).__init__(data=data, shape=shape, dtype=dtype, buffer=buffer, offset=offset, usage=usage)
+    def __init__(self, data=None, shape=None, dtype=None, buffer=None, offset=0, usage=None, internal_format=None, label=None):
+        super(TextureBuffer, self).__init__(data=data, shape=shape, dtype=dtype, buffer=buffer, offset=offset, usage=usage, label=label)
 
         # create the texture
         self._texture = BufferTexture(self, internal_format)
@@ -20,13 +20,14 @@ class BufferPointer(object):
             pointer = BufferPointer(buffer=buffer, count=buffer.shape[-1], stride=dtype.itemsize, offset=0, dtype=dtype.base)
             return pointer
 
-    def __init__(self, buffer, count=3, stride=0, offset=0, dtype=np.float32, normalize=False):
+    def __init__(self, buffer, count=3, stride=0, offset=0, dtype=np.float32, normalize=False, divisor=0):
         self._buffer = buffer
         self.count = count
         self.stride = stride or (count * np.dtype(dtype).itemsize)
         self.offset = ctypes.c_void_p(offset) if offset else None
         self.dtype = dtype
         self.normalize = normalize
+        self.divisor = divisor
 
     def enable(self, location):
         dtype = dtypes.for_dtype(self.dtype)
@@ -43,10 +44,82 @@ class BufferPointer(object):
             else:
                 # all others
                 GL.glVertexAttribPointer(location, self.count, dtype.gl_enum, self.normalize, self.stride, self.offset)
+            # GL 3.3
+            GL.glVertexAttribDivisor(location, self.divisor)
 
     def disable(self, location):
         GL.glDisableVertexAttribArray(location)
 
+    def set_format(self, location, binding, vertex_array=None):
+        # GL 4.3
+        # specify the attribute format independently of the buffer
+        # the offset within each vertex is part of the format, the vertex's offset
+        # is provided when the buffer is bound, so interleaved attributes share a binding
+        # if a vertex array handle is provided, use GL 4.5 direct state access
+        dtype = dtypes.for_dtype(self.dtype)
+        relative_offset = self.relative_offset
+        if vertex_array is not None:
+            GL.glEnableVertexArrayAttrib(vertex_array, location)
+            if dtype.dtype == np.float64:
+                GL.glVertexArrayAttribLFormat(vertex_array, location, self.count, dtype.gl_enum, relative_offset)
+            elif np.issubdtype(dtype.dtype, np.integer):
+                GL.glVertexArrayAttribIFormat(vertex_array, location, self.count, dtype.gl_enum, relative_offset)
+            else:
+                GL.glVertexArrayAttribFormat(vertex_array, location, self.count, dtype.gl_enum, self.normalize, relative_offset)
+            GL.glVertexArrayAttribBinding(vertex_array, location, binding)
+        else:
+            GL.glEnableVertexAttribArray(location)
+            if dtype.dtype == np.float64:
+                GL.glVertexAttribLFormat(location, self.count, dtype.gl_enum, relative_offset)
+            elif np.issubdtype(dtype.dtype, np.integer):
+                GL.glVertexAttribIFormat(location, self.count, dtype.gl_enum, relative_offset)
+            else:
+                GL.glVertexAttribFormat(location, self.count, dtype.gl_enum, self.normalize, relative_offset)
+            GL.glVertexAttribBinding(location, binding)
+
+    def bind_vertex_buffer(self, binding, vertex_array=None):
+        # GL 4.3
+        offset = self.vertex_offset
+        if vertex_array is not None:
+            GL.glVertexArrayVertexBuffer(vertex_array, binding, int(self._buffer.handle), offset, self.stride)
+        else:
+            GL.glBindVertexBuffer(binding, int(self._buffer.handle), offset, self.stride)
+
+    def set_divisor(self, binding, vertex_array=None):
+        # GL 4.3
+        if vertex_array is not None:
+            GL.glVertexArrayBindingDivisor(vertex_array, binding, self.divisor)
+        else:
+            GL.glVertexBindingDivisor(binding, self.divisor)
+
+    @property
+    def vertex_offset(self):
+        """The offset of the vertex containing the pointer's first element.
+        """
+        offset = self.offset.value if self.offset else 0
+        return offset - (offset % self.stride)
+
+    @property
+    def relative_offset(self):
+        """The offset of the pointer within each vertex.
+        """
+        offset = self.offset.value if self.offset else 0
+        return offset % self.stride
+
+    @property
+    def format_key(self):
+        """The attribute format, pointers with the same key can share a format.
+        """
+        return (self.count, np.dtype(self.dtype), bool(self.normalize), self.relative_offset)
+
+    @property
+    def binding_key(self):
+        """The buffer binding, pointers with the same key can share a binding.
+
+        Interleaved attributes of the same buffer share a key.
+        """
+        return (int(self._buffer.handle), self.vertex_offset, self.stride, self.divisor)
+
     @property
     def size(self):
         offset = 0
@@ -60,7 +133,7 @@ class BufferPointer(object):
         return self._buffer
 
     def __str__(self):
-        return '<{cls} {id} {count}, {stride}, {offset}, {dtype}, {normalize}>'.format(
+        return '<{cls} {id} {count}, {stride}, {offset}, {dtype}, {normalize}, {divisor}>'.format(
             cls=self.__class__.__name__,
             id=self._buffer.handle,
             **self.__dict__
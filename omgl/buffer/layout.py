@@ -0,0 +1,114 @@
+from __future__ import absolute_import
+import numpy as np
+from .buffer import VertexBuffer
+
+
+def _align(value, alignment):
+    return ((value + alignment - 1) // alignment) * alignment
+
+def _fields(arrays):
+    # dictionaries have no order, so sort them by name to keep the layout stable
+    # pass a list of (name, array) tuples to control the order of the fields
+    if hasattr(arrays, 'items'):
+        arrays = sorted(arrays.items())
+    return [(name, np.asarray(array)) for name, array in arrays]
+
+def interleaved_dtype(fields, align=4):
+    """Creates a structured dtype with each field and the stride aligned.
+
+    Fields are a list of (name, dtype, shape) tuples.
+    Each field is aligned to the larger of align and the size of its
+    components, the stride is rounded up to a multiple of align.
+    """
+    names, formats, offsets = [], [], []
+    offset = 0
+    for name, dtype, shape in fields:
+        dtype = np.dtype(dtype)
+        offset = _align(offset, max(align, dtype.itemsize))
+
+        names.append(name)
+        formats.append((dtype, shape) if shape else dtype)
+        offsets.append(offset)
+        offset += dtype.itemsize * reduce(lambda x,y: x*y, shape, 1)
+
+    return np.dtype({
+        'names': names,
+        'formats': formats,
+        'offsets': offsets,
+        'itemsize': _align(offset, align),
+    })
+
+def interleave(arrays, align=4):
+    """Interleaves separate per-vertex arrays into a single structured array.
+
+    Arrays may be a dict or a list of (name, array) tuples.
+    The first dimension of each array is the vertex, any remaining
+    dimensions are the components of the attribute.
+    """
+    fields = _fields(arrays)
+    if not fields:
+        raise ValueError('No arrays provided')
+
+    lengths = set(len(array) for _, array in fields)
+    if len(lengths) != 1:
+        raise ValueError('Arrays must have the same number of vertices')
+
+    dtype = interleaved_dtype(
+        [(name, array.dtype, array.shape[1:]) for name, array in fields],
+        align=align
+    )
+
+    # zero the padding so the buffer contents are deterministic
+    data = np.zeros(lengths.pop(), dtype=dtype)
+    for name, array in fields:
+        data[name] = array
+    return data
+
+def create_interleaved_buffer(arrays, align=4, usage=None, buffer_type=VertexBuffer):
+    """Creates a single buffer with all attributes interleaved.
+
+    Returns a list containing the buffer so it can be swapped with
+    create_split_buffers when comparing layouts.
+    """
+    data = interleave(arrays, align=align)
+    return [buffer_type(data, usage=usage)]
+
+def create_split_buffers(arrays, streams=None, align=4, usage=None, buffer_type=VertexBuffer):
+    """Creates a buffer per stream of attributes.
+
+    Streams is a list of lists of attribute names, each list becomes one
+    interleaved buffer.
+    For example, keeping positions in their own tightly packed buffer for
+    depth-only passes::
+
+        buffers = create_split_buffers(arrays, [['in_position'], ['in_normal', 'in_uv']])
+
+    By default each attribute is placed in its own buffer.
+    """
+    fields = _fields(arrays)
+    arrays = dict(fields)
+    streams = streams or [[name] for name, _ in fields]
+
+    names = [name for stream in streams for name in stream]
+    if sorted(names) != sorted(arrays.keys()):
+        raise ValueError('Each array must be in exactly one stream')
+
+    return [
+        buffer_type(
+            interleave([(name, arrays[name]) for name in stream], align=align),
+            usage=usage
+        )
+        for stream in streams
+    ]
+
+def buffer_pointers(buffers):
+    """Merges the pointers of a list of buffers into a single dict.
+
+    The result can be passed directly to a Mesh::
+
+        mesh = Mesh(pipeline, **buffer_pointers(buffers))
+    """
+    pointers = {}
+    for buffer in buffers:
+        pointers.update(buffer.pointers)
+    return pointers
@@ -0,0 +1,231 @@
+from __future__ import absolute_import
+import ctypes
+import numpy as np
+from OpenGL import GL
+from OpenGL.raw.GL.VERSION import GL_1_0 as raw_gl
+from .. import dtypes
+from .. import features
+from ..counters import counters
+from .buffer import PixelPackBuffer
+from ..sync.fence import Fence
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+class ReadbackFuture(object):
+    """The result of an asynchronous read into a ReadbackRing.
+
+    The data is copied out of the pack buffer the first time the result
+    is requested once the GPU has finished writing it::
+
+        future = texture.read_async(out=frame)
+        # ... render the next frame
+        if future.done():
+            frame = future.result()
+
+    Futures can also be awaited from an asyncio event loop running on the
+    thread that owns the GL context.
+    """
+    def __init__(self, ring, start, out):
+        self._ring = ring
+        self._start = start
+        self._out = out
+        self._fence = Fence()
+        self._resolved = False
+
+    def done(self):
+        """Returns True if the result is available without blocking.
+        """
+        return self._resolved or self._fence.poll()
+
+    def result(self, timeout=None):
+        """Blocks until the GPU has written the data, and returns it.
+
+        Raises ValueError if the timeout, in seconds, expires.
+        """
+        if not self._resolved:
+            if not self._fence.wait(timeout):
+                raise ValueError('Readback timed out')
+            self._ring._copy(self._start, self._out)
+            self._resolved = True
+            self._fence = None
+        return self._out
+
+    def future(self, interval=0.001, loop=None):
+        """Returns an asyncio future that is resolved with the result.
+        """
+        if not asyncio:
+            raise ValueError('asyncio not available')
+
+        loop = loop or asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def resolve(fence_future):
+            try:
+                future.set_result(self.result())
+            except Exception as e:
+                future.set_exception(e)
+
+        if self._resolved:
+            future.set_result(self._out)
+        else:
+            self._fence.future(interval, loop).add_done_callback(resolve)
+        return future
+
+    def __await__(self):
+        return self.future().__await__()
+
+
+class ReadbackRing(object):
+    """Reads textures and framebuffers into a ring of PixelPackBuffer regions.
+
+    Reads are performed by the GPU, so they don't wait for rendering to finish.
+    Each read returns a ReadbackFuture, which copies the data into an array
+    once the GPU has written it, usually a frame or two later::
+
+        readback = ReadbackRing(texture.level_nbytes(0), count=3)
+        frame = np.empty(texture.shape, texture.dtype)
+        for index in range(1000):
+            mesh.render()
+            future = readback.read_texture(texture, out=frame)
+            # the future is resolved by the next read of its region
+            future.result()
+
+    With count regions, up to count reads can be pending.
+    When the ring wraps around, the oldest read is resolved before its region is
+    reused, so its result is never lost.
+
+    The buffer is mapped once and left mapped when immutable buffer storage
+    is available (GL 4.4), otherwise each region is mapped for each copy.
+    """
+    # aligned for mapping and for pixel transfers
+    _alignment = 256
+
+    def __init__(self, nbytes, count=3, persistent=True, label=None):
+        self._count = count
+        self._region_nbytes = (nbytes + self._alignment - 1) // self._alignment * self._alignment
+        self._index = 0
+        self._pending = [None] * count
+        self._mapping = None
+        self._persistent = persistent and bool(features.buffer_storage)
+
+        shape = (self._region_nbytes * count,)
+        if self._persistent:
+            # GL 4.4
+            # coherent mappings see GPU writes once the fence is signaled
+            flags = GL.GL_MAP_READ_BIT | GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT
+            self._buffer = PixelPackBuffer(shape=shape, dtype=np.uint8, flags=flags, label=label)
+            self._mapping = self._buffer.map_range(access=flags)
+        else:
+            self._buffer = PixelPackBuffer(shape=shape, dtype=np.uint8, usage=GL.GL_STREAM_READ, label=label)
+
+    def _next_region(self, nbytes):
+        if nbytes > self._region_nbytes:
+            raise ValueError('Data is larger than the readback regions')
+
+        index = self._index
+        self._index = (index + 1) % self._count
+
+        # resolve the previous read of this region before it is overwritten
+        pending = self._pending[index]
+        if pending is not None:
+            pending.result()
+            self._pending[index] = None
+        return index
+
+    def _future(self, index, out):
+        future = ReadbackFuture(self, index * self._region_nbytes, out)
+        self._pending[index] = future
+        return future
+
+    def _output(self, out, shape, dtype):
+        if out is None:
+            return np.empty(shape, dtype=dtype)
+        if out.nbytes != np.dtype(dtype).itemsize * reduce(lambda x,y: x*y, shape, 1) or not out.flags.c_contiguous:
+            raise ValueError('Output array must be contiguous and match the read size')
+        return out
+
+    def read_texture(self, texture, level=0, out=None):
+        """Reads a level of a texture, returning a ReadbackFuture.
+
+        The result has the shape of the level, as returned by texture.get_data.
+        """
+        shape = texture.level_size(level) + [texture.shape[-1]]
+        out = self._output(out, shape, dtypes.for_dtype(np.dtype(texture.dtype)).dtype)
+        index = self._next_region(out.nbytes)
+
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        texture.get_data_into_buffer(self._buffer, buffer_offset=index * self._region_nbytes, level=level)
+        return self._future(index, out)
+
+    def read_pixels(self, x, y, width, height, format=GL.GL_RGBA, dtype=np.uint8, out=None):
+        """Reads pixels from the bound read framebuffer, returning a ReadbackFuture.
+
+        The result has the shape (width, height, channels), matching Context.read_pixels.
+        """
+        channels = {
+            GL.GL_RED: 1,
+            GL.GL_RG: 2,
+            GL.GL_RGB: 3,
+            GL.GL_BGR: 3,
+            GL.GL_RGBA: 4,
+            GL.GL_BGRA: 4,
+            GL.GL_DEPTH_COMPONENT: 1,
+            GL.GL_STENCIL_INDEX: 1,
+        }[format]
+        data_type = dtypes.for_dtype(np.dtype(dtype))
+        out = self._output(out, (width, height, channels), data_type.dtype)
+        index = self._next_region(out.nbytes)
+
+        # the data pointer is an offset into the bound pack buffer
+        # the raw function is used as PyOpenGL's wrapper allocates an array
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        with self._buffer:
+            raw_gl.glReadPixels(x, y, width, height, format, data_type.gl_enum, ctypes.c_void_p(index * self._region_nbytes))
+        return self._future(index, out)
+
+    def _copy(self, start, out):
+        data = out.reshape(-1).view(np.uint8)
+        if self._mapping is not None:
+            data[:] = self._mapping[start:start + out.nbytes]
+        else:
+            mapping = self._buffer.map_range(start, out.nbytes, GL.GL_MAP_READ_BIT)
+            data[:] = mapping
+            self._buffer.unmap()
+
+        if counters.enabled:
+            counters.add('bytes_read', out.nbytes, label=self.__class__.__name__)
+
+    def wait(self):
+        """Resolves all pending reads.
+        """
+        for future in self._pending:
+            if future is not None:
+                future.result()
+        self._pending = [None] * self._count
+
+    def close(self):
+        """Resolves all pending reads and unmaps the buffer.
+        """
+        self.wait()
+        if self._mapping is not None:
+            self._buffer.unmap()
+            self._mapping = None
+
+    @property
+    def buffer(self):
+        return self._buffer
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def region_nbytes(self):
+        return self._region_nbytes
+
+    @property
+    def persistent(self):
+        return self._persistent
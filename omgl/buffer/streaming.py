@@ -0,0 +1,118 @@
+from __future__ import absolute_import
+import numpy as np
+from OpenGL import GL
+from .. import features
+from ..counters import counters
+from .buffer import PixelUnpackBuffer
+from ..sync.fence import RegionGuard
+
+
+def _align(nbytes, alignment):
+    return (nbytes + alignment - 1) // alignment * alignment
+
+
+class TextureStreamer(object):
+    """Streams data into a texture through a ring of PixelUnpackBuffer regions.
+
+    Each upload is copied into the next region of the ring and the texture
+    is updated from that region by the GPU, so uploads don't wait for the
+    GPU to finish with previous frames.
+    A region is only overwritten once the GPU has finished reading it, so
+    with count regions the CPU can be up to count uploads ahead of the GPU::
+
+        streamer = TextureStreamer(texture, count=3)
+        for frame in frames:
+            streamer.upload(frame)
+            mesh.render()
+
+    The buffer is mapped once and left mapped when immutable buffer storage
+    is available (GL 4.4), otherwise each region is mapped for each upload.
+    By default each region holds level 0 of the texture.
+    """
+    # aligned for mapping and for the texture formats' pixel transfers
+    _alignment = 256
+
+    def __init__(self, texture, nbytes=None, count=3, persistent=True, label=None):
+        if nbytes is None:
+            nbytes = np.dtype(texture.dtype).itemsize * reduce(lambda x,y: x*y, texture.shape, 1)
+
+        self._texture = texture
+        self._count = count
+        self._region_nbytes = _align(nbytes, self._alignment)
+        self._index = 0
+        self._guard = RegionGuard()
+        self._mapping = None
+        self._persistent = persistent and bool(features.buffer_storage)
+
+        shape = (self._region_nbytes * count,)
+        if self._persistent:
+            # GL 4.4
+            # coherent mappings don't need to be flushed before the GPU reads them
+            flags = GL.GL_MAP_WRITE_BIT | GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT
+            self._buffer = PixelUnpackBuffer(shape=shape, dtype=np.uint8, flags=flags, label=label)
+            self._mapping = self._buffer.map_range(access=flags)
+        else:
+            self._buffer = PixelUnpackBuffer(shape=shape, dtype=np.uint8, usage=GL.GL_STREAM_DRAW, label=label)
+
+    def upload(self, data, format=None, offset=None, level=0):
+        """Copies data into the next region and updates the texture from it.
+
+        Only blocks if the GPU hasn't finished reading the region from count uploads ago.
+        """
+        data = np.ascontiguousarray(data)
+        if data.nbytes > self._region_nbytes:
+            raise ValueError('Data is larger than the stream regions')
+
+        start = self._index * self._region_nbytes
+        self._index = (self._index + 1) % self._count
+        self._guard.wait(start, self._region_nbytes)
+
+        data_bytes = data.reshape(-1).view(np.uint8)
+        if self._mapping is not None:
+            self._mapping[start:start + data.nbytes] = data_bytes
+        else:
+            # the guard has synchronised the region, so the driver doesn't need to
+            access = GL.GL_MAP_WRITE_BIT | GL.GL_MAP_INVALIDATE_RANGE_BIT | GL.GL_MAP_UNSYNCHRONIZED_BIT
+            mapping = self._buffer.map_range(start, data.nbytes, access)
+            mapping[:] = data_bytes
+            self._buffer.unmap()
+
+        self._texture.set_data_from_buffer(self._buffer, data.shape, data.dtype, buffer_offset=start, format=format, offset=offset, level=level)
+        self._guard.protect(start, self._region_nbytes)
+
+        if counters.enabled:
+            counters.add('bytes_uploaded', data.nbytes, label=self.__class__.__name__)
+
+    def wait(self, timeout=None):
+        """Blocks until the GPU has read all uploaded data.
+        """
+        return self._guard.wait(0, self._buffer.nbytes, timeout)
+
+    def close(self):
+        """Waits for pending uploads and unmaps the buffer.
+        """
+        self.wait()
+        if self._mapping is not None:
+            self._buffer.unmap()
+            self._mapping = None
+        self._guard.clear()
+
+    @property
+    def texture(self):
+        return self._texture
+
+    @property
+    def buffer(self):
+        return self._buffer
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def region_nbytes(self):
+        return self._region_nbytes
+
+    @property
+    def persistent(self):
+        return self._persistent
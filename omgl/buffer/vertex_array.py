@@ -1,22 +1,47 @@
 from __future__ import absolute_import
+import weakref
 from OpenGL import GL
 import numpy as np
 from .buffer import IndexBuffer
 from .buffer_pointer import BufferPointer
 from ..object import ManagedObject, BindableObject
 from .. import dtypes
+from .. import features
+from ..counters import counters
+from ..context import PerContext
+
+
+class _Unbound(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+_unbound = _Unbound()
 
 
 class VertexArray(BindableObject, ManagedObject):
     _create_func = GL.glGenVertexArrays
+    _dsa_create_func = GL.glCreateVertexArrays
     _delete_func = GL.glDeleteVertexArrays
     _bind_func = GL.glBindVertexArray
+    _label_identifier = GL.GL_VERTEX_ARRAY
 
-    def __init__(self):
+    def __init__(self, label=None):
         super(VertexArray, self).__init__()
         self._pointers = {}
+        # the format, binding key and binding index last specified for each attribute
+        self._keys = {}
+        # the binding key of each buffer binding index
+        self._bindings = {}
         self._count = 0
 
+        if label:
+            # generated names aren't vertex arrays until they are first bound
+            with self:
+                self.label = label
+
     def __getitem__(self, index):
         return self._pointers[index]
 
@@ -27,44 +52,220 @@ class VertexArray(BindableObject, ManagedObject):
         if not isinstance(value, BufferPointer):
             raise ValueError('Requires BufferPointer')
 
-        with self:
-            value.enable(index)
-
-        self._pointers[index] = value
-        self._update_count()
+        pointers = dict(self._pointers)
+        pointers[index] = value
+        self.set_pointers(pointers)
 
     def __delitem__(self, index):
         if not isinstance(index, int):
             raise ValueError('Indices must be integers')
 
-        with self:
-            GL.glDisableVertexAttribArray(index)
-
-        del self._pointers[index]
-        self._update_count()
+        pointers = dict(self._pointers)
+        del pointers[index]
+        self.set_pointers(pointers)
 
     def __iter__(self):
-        return self._pointers.keys()
+        return iter(self._pointers)
 
     def __len__(self):
         return len(self._pointers.keys())
 
+    def _editing(self):
+        # direct state access modifies the vertex array without binding it
+        if features.direct_state_access:
+            return _unbound
+        return self
+
+    def _assign_bindings(self, pointers):
+        # interleaved attributes share a buffer binding
+        groups = {}
+        for index, pointer in pointers.items():
+            groups.setdefault(pointer.binding_key, set()).add(index)
+
+        old_groups = {}
+        for index, (format_key, binding_key, binding) in self._keys.items():
+            old_groups.setdefault(binding, set()).add(index)
+
+        # keep bindings whose buffer hasn't changed
+        assigned = {}
+        for binding, binding_key in self._bindings.items():
+            if binding_key in groups:
+                assigned[binding_key] = binding
+
+        # re-point bindings used by the same attributes, which only re-binds the buffer
+        used = set(assigned.values())
+        for binding_key, indices in groups.items():
+            if binding_key in assigned:
+                continue
+            for binding, old_indices in old_groups.items():
+                if binding not in used and old_indices == indices:
+                    assigned[binding_key] = binding
+                    used.add(binding)
+                    break
+
+        # remaining groups use free binding indices
+        free = (binding for binding in range(len(pointers) + len(self._bindings)) if binding not in used)
+        for binding_key in groups:
+            if binding_key not in assigned:
+                binding = next(free)
+                assigned[binding_key] = binding
+                used.add(binding)
+        return assigned
+
+    def _set_pointers(self, pointers):
+        # the vertex array must be bound, unless using direct state access
+        # compare against the keys we last specified, not the current pointers
+        # as the pointers may have been modified since
+        dsa = features.direct_state_access
+        if not (dsa or features.separate_attribute_format):
+            for index, pointer in pointers.items():
+                keys = (pointer.format_key, pointer.binding_key, None)
+                if self._keys.get(index) != keys:
+                    pointer.enable(index)
+                    self._keys[index] = keys
+            return
+
+        vertex_array = int(self._handle) if dsa else None
+        assigned = self._assign_bindings(pointers)
+
+        bindings = {}
+        for index, pointer in pointers.items():
+            binding_key = pointer.binding_key
+            binding = assigned[binding_key]
+            if binding not in bindings:
+                # one call per binding, however many attributes use it
+                old_key = self._bindings.get(binding)
+                if old_key != binding_key:
+                    if old_key is None or old_key[:3] != binding_key[:3]:
+                        pointer.bind_vertex_buffer(binding, vertex_array)
+                    if old_key is None or old_key[3] != binding_key[3]:
+                        pointer.set_divisor(binding, vertex_array)
+                bindings[binding] = binding_key
+
+            format_key, _, old_binding = self._keys.get(index, (None, None, None))
+            if pointer.format_key != format_key or binding != old_binding:
+                pointer.set_format(index, binding, vertex_array)
+            self._keys[index] = (pointer.format_key, binding_key, binding)
+        self._bindings = bindings
+
+    def _delete_pointer(self, index):
+        # the vertex array must be bound, unless using direct state access
+        if features.direct_state_access:
+            GL.glDisableVertexArrayAttrib(int(self._handle), index)
+        else:
+            GL.glDisableVertexAttribArray(index)
+        del self._pointers[index]
+        del self._keys[index]
+
     def _update_count(self):
-        self._count = min(map(lambda x: x.size, self._pointers.values()))
+        # instanced attributes don't limit the number of vertices
+        sizes = [pointer.size for pointer in self._pointers.values() if not pointer.divisor]
+        self._count = min(sizes) if sizes else 0
+
+    def set_pointers(self, pointers):
+        """Replaces all pointers with a dict of location: BufferPointer.
+
+        Only attributes that have changed are updated.
+        Pointers with the same format as the existing attribute only
+        re-bind their buffer.
+        """
+        for index, pointer in pointers.items():
+            if not isinstance(index, int):
+                raise ValueError('Indices must be integers')
+            if not isinstance(pointer, BufferPointer):
+                raise ValueError('Requires BufferPointer')
+
+        with self._editing():
+            for index in list(self._pointers.keys()):
+                if index not in pointers:
+                    self._delete_pointer(index)
+
+            self._set_pointers(pointers)
+            self._pointers = dict(pointers)
+
+        self._update_count()
 
     def clear(self):
-        for location in self._pointers.keys():
-            del self[location]
+        self.set_pointers({})
 
-    def render(self, primitive=GL.GL_TRIANGLES, start=None, count=None):
+    def render(self, primitive=GL.GL_TRIANGLES, start=None, count=None, instances=None):
         start = start or 0
         count = count or (self._count - start)
         with self:
-            GL.glDrawArrays(primitive, start, count)
+            if instances is not None:
+                GL.glDrawArraysInstanced(primitive, start, count, instances)
+            else:
+                GL.glDrawArrays(primitive, start, count)
+
+        if counters.enabled:
+            counters.draw(count, instances)
+
+    def render_ranges(self, starts, counts, primitive=GL.GL_TRIANGLES):
+        """Renders multiple ranges of vertices with a single draw call.
+
+        Starts and counts are sequences (or numpy arrays) of the first
+        vertex and number of vertices of each range.
+        """
+        starts = np.ascontiguousarray(starts, dtype=np.int32)
+        counts = np.ascontiguousarray(counts, dtype=np.int32)
+        with self:
+            GL.glMultiDrawArrays(primitive, starts, counts, len(counts))
+
+        if counters.enabled:
+            counters.draw(int(counts.sum()), calls=len(counts))
+
+    def render_indices(self, indices, primitive=GL.GL_TRIANGLES, start=None, count=None, base_vertex=None, instances=None):
+        if not isinstance(indices, IndexBuffer):
+            raise ValueError('Indices must be of type IndexBuffer')
+
+        with self:
+            indices.render(primitive, start, count, base_vertex, instances)
 
-    def render_indices(self, indices, primitive=GL.GL_TRIANGLES, start=None, count=None):
+    def render_indices_ranges(self, indices, starts, counts, primitive=GL.GL_TRIANGLES, base_vertices=None):
         if not isinstance(indices, IndexBuffer):
             raise ValueError('Indices must be of type IndexBuffer')
 
         with self:
-            indices.render(primitive, start, count)
+            indices.render_ranges(starts, counts, primitive, base_vertices)
+
+
+class VertexArrayCache(object):
+    """Shares vertex arrays between identical attribute layouts.
+
+    Layouts are keyed by the attribute location, buffer, format, stride,
+    offset and divisor of each pointer.
+    Index buffers are bound for each draw, so meshes with different indices share vertex arrays.
+    Vertex arrays are held weakly and are deleted once nothing references them.
+
+    Vertex arrays returned by the cache are shared and must not be modified.
+    """
+    def __init__(self):
+        self._vertex_arrays = weakref.WeakValueDictionary()
+
+    @classmethod
+    def layout_key(cls, pointers):
+        return tuple(sorted(
+            (location, pointer.format_key, pointer.binding_key, pointer.divisor)
+            for location, pointer in pointers.items()
+        ))
+
+    def get(self, pointers):
+        """Returns a vertex array for a dict of location: BufferPointer.
+        """
+        key = self.layout_key(pointers)
+        vertex_array = self._vertex_arrays.get(key)
+        if vertex_array is None:
+            vertex_array = VertexArray()
+            vertex_array.set_pointers(pointers)
+            self._vertex_arrays[key] = vertex_array
+        return vertex_array
+
+    def clear(self):
+        self._vertex_arrays.clear()
+
+    def __len__(self):
+        return len(self._vertex_arrays)
+
+
+# vertex arrays can't be shared between contexts
+vertex_array_cache = PerContext(VertexArrayCache)
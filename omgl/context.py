@@ -0,0 +1,342 @@
+"""Headless OpenGL contexts.
+
+PyOpenGL selects its platform when OpenGL is first imported, so the platform
+must be selected before OpenGL or any other OMGL module is imported::
+
+    from omgl import context
+    context.use_platform('egl')
+    ctx = context.Context(width=1024, height=768, version=(4,5))
+
+    from omgl.texture import Texture2D
+    ...
+    pixels = ctx.read_pixels()
+
+This module doesn't import OpenGL until a context is created.
+"""
+from __future__ import absolute_import
+import os
+import sys
+import ctypes
+
+platforms = ['egl', 'osmesa']
+
+# caches used when the current context wasn't created by OMGL
+_default_caches = {}
+
+
+def use_platform(platform):
+    """Selects the PyOpenGL platform for headless contexts.
+    """
+    if platform not in platforms:
+        raise ValueError('Unknown platform {}'.format(platform))
+
+    if 'OpenGL.platform' in sys.modules:
+        current = os.environ.get('PYOPENGL_PLATFORM')
+        if current != platform:
+            raise ValueError('OpenGL has already been imported, use_platform must be called first')
+
+    os.environ['PYOPENGL_PLATFORM'] = platform
+    if platform == 'egl':
+        # Mesa's surfaceless platform needs neither a display nor a GPU
+        os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+
+def current():
+    """Returns the current OMGL context, or None if the current context
+    wasn't created by OMGL.
+    """
+    return Context._current
+
+
+def cache(key, factory):
+    """Returns the object stored under key for the current context,
+    creating it with factory if it doesn't exist.
+    """
+    context = Context._current
+    caches = context._caches if context is not None else _default_caches
+    value = caches.get(key)
+    if value is None:
+        value = caches[key] = factory()
+    return value
+
+
+class PerContext(object):
+    """Proxies an object that is created once for each context.
+
+    Objects that hold OpenGL objects, such as caches, can't be shared between
+    contexts that don't share objects::
+
+        vertex_array_cache = PerContext(VertexArrayCache)
+        vertex_array_cache.get(pointers)
+    """
+    def __init__(self, factory):
+        self._factory = factory
+
+    @property
+    def instance(self):
+        return cache(self, self._factory)
+
+    def __getattr__(self, name):
+        return getattr(self.instance, name)
+
+    def __len__(self):
+        return len(self.instance)
+
+    def __iter__(self):
+        return iter(self.instance)
+
+
+class _EGL(object):
+    def __init__(self, width, height, version, profile, debug, surfaceless):
+        from OpenGL import EGL
+        self._egl = EGL
+
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise ValueError('Unable to initialise EGL')
+
+        # headless platforms only provide pbuffer configs
+        config_attribs = (EGL.EGLint * 9)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_STENCIL_SIZE, 8,
+            EGL.EGL_NONE,
+        )
+
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        if not EGL.eglChooseConfig(self.display, config_attribs, ctypes.pointer(config), 1, ctypes.pointer(count)) or not count.value:
+            raise ValueError('No suitable EGL config')
+
+        if surfaceless:
+            # EGL_KHR_surfaceless_context
+            self.surface = EGL.EGL_NO_SURFACE
+        else:
+            surface_attribs = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+            self.surface = EGL.eglCreatePbufferSurface(self.display, config, surface_attribs)
+            if not self.surface:
+                raise ValueError('Unable to create an EGL pbuffer')
+
+        profile_bit = {
+            'core': EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+            'compatibility': EGL.EGL_CONTEXT_OPENGL_COMPATIBILITY_PROFILE_BIT,
+        }[profile]
+        context_attribs = [
+            EGL.EGL_CONTEXT_MAJOR_VERSION, version[0],
+            EGL.EGL_CONTEXT_MINOR_VERSION, version[1],
+            EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, profile_bit,
+        ]
+        if debug:
+            context_attribs += [EGL.EGL_CONTEXT_OPENGL_DEBUG, EGL.EGL_TRUE]
+        context_attribs += [EGL.EGL_NONE]
+        context_attribs = (EGL.EGLint * len(context_attribs))(*context_attribs)
+
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, context_attribs)
+        if not self.context:
+            raise ValueError('Unable to create an OpenGL {}.{} {} context'.format(version[0], version[1], profile))
+
+    def make_current(self):
+        if not self._egl.eglMakeCurrent(self.display, self.surface, self.surface, self.context):
+            raise ValueError('Unable to make the context current')
+
+    def release(self):
+        EGL = self._egl
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+
+    def destroy(self):
+        EGL = self._egl
+        EGL.eglDestroyContext(self.display, self.context)
+        if self.surface != EGL.EGL_NO_SURFACE:
+            EGL.eglDestroySurface(self.display, self.surface)
+
+
+class _OSMesa(object):
+    def __init__(self, width, height, version, profile, debug, surfaceless):
+        from OpenGL import GL, arrays
+        from OpenGL import osmesa
+        self._osmesa = osmesa
+        self._gl = GL
+
+        profile_enum = {
+            'core': osmesa.OSMESA_CORE_PROFILE,
+            'compatibility': osmesa.OSMESA_COMPAT_PROFILE,
+        }[profile]
+        attribs = arrays.GLintArray.asArray([
+            osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+            osmesa.OSMESA_DEPTH_BITS, 24,
+            osmesa.OSMESA_STENCIL_BITS, 8,
+            osmesa.OSMESA_PROFILE, profile_enum,
+            osmesa.OSMESA_CONTEXT_MAJOR_VERSION, version[0],
+            osmesa.OSMESA_CONTEXT_MINOR_VERSION, version[1],
+            0,
+        ])
+        self.context = osmesa.OSMesaCreateContextAttribs(attribs, None)
+        if not self.context:
+            raise ValueError('Unable to create an OpenGL {}.{} {} context'.format(version[0], version[1], profile))
+
+        # OSMesa always renders into a client side buffer
+        self.width = width
+        self.height = height
+        self.buffer = arrays.GLubyteArray.zeros((height, width, 4))
+
+    def make_current(self):
+        if not self._osmesa.OSMesaMakeCurrent(self.context, self.buffer, self._gl.GL_UNSIGNED_BYTE, self.width, self.height):
+            raise ValueError('Unable to make the context current')
+
+    def release(self):
+        pass
+
+    def destroy(self):
+        self._osmesa.OSMesaDestroyContext(self.context)
+
+
+class Context(object):
+    """A headless OpenGL context, created with EGL or OSMesa.
+
+    Unless framebuffer is False, the context owns a framebuffer object of the
+    requested size with RGBA8 colour and 24 bit depth / 8 bit stencil
+    renderbuffers, which is bound as the draw and read framebuffer when the
+    context is made current.
+    This is required for surfaceless EGL contexts, which have no default framebuffer.
+
+    Caches of OpenGL objects, such as the vertex array cache, are kept per context.
+    Feature support is re-detected whenever a context is made current.
+    """
+    _current = None
+
+    def __init__(self, width=64, height=64, version=(4, 5), profile='core', platform=None, surfaceless=True, framebuffer=True, debug=False):
+        platform = platform or os.environ.get('PYOPENGL_PLATFORM', 'egl')
+        if platform not in platforms:
+            raise ValueError('Unknown platform {}'.format(platform))
+        if profile not in ['core', 'compatibility']:
+            raise ValueError('Unknown profile {}'.format(profile))
+
+        self.width = width
+        self.height = height
+        self.version = tuple(version)
+        self.profile = profile
+        self.platform = platform
+        self._caches = {}
+        self._framebuffer = None
+        self._renderbuffers = []
+        self._readback = None
+
+        impl = {'egl': _EGL, 'osmesa': _OSMesa}[platform]
+        self._impl = impl(width, height, self.version, profile, debug, surfaceless)
+        self.make_current()
+
+        if framebuffer:
+            self._create_framebuffer()
+            self._bind_framebuffer()
+
+    def _create_framebuffer(self):
+        from OpenGL import GL
+
+        self._framebuffer = GL.glGenFramebuffers(1)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self._framebuffer)
+        for internal_format, attachment in [
+            (GL.GL_RGBA8, GL.GL_COLOR_ATTACHMENT0),
+            (GL.GL_DEPTH24_STENCIL8, GL.GL_DEPTH_STENCIL_ATTACHMENT),
+        ]:
+            renderbuffer = GL.glGenRenderbuffers(1)
+            GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, renderbuffer)
+            GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, internal_format, self.width, self.height)
+            GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, attachment, GL.GL_RENDERBUFFER, renderbuffer)
+            self._renderbuffers.append(renderbuffer)
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, 0)
+
+        status = GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER)
+        if status != GL.GL_FRAMEBUFFER_COMPLETE:
+            raise ValueError('Framebuffer incomplete: {}'.format(status))
+
+    def _bind_framebuffer(self):
+        from OpenGL import GL
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self._framebuffer)
+        GL.glDrawBuffers([GL.GL_COLOR_ATTACHMENT0])
+        GL.glReadBuffer(GL.GL_COLOR_ATTACHMENT0)
+        GL.glViewport(0, 0, self.width, self.height)
+
+    def make_current(self):
+        from . import features
+
+        self._impl.make_current()
+        Context._current = self
+        features.reset()
+        if self._framebuffer is not None:
+            self._bind_framebuffer()
+
+    def release(self):
+        self._impl.release()
+        if Context._current is self:
+            Context._current = None
+
+    def destroy(self):
+        """Deletes the context and the objects it owns.
+        """
+        from OpenGL import GL
+
+        if Context._current is not self:
+            self.make_current()
+        self._caches.clear()
+        if self._readback is not None:
+            self._readback.close()
+            self._readback = None
+        if self._framebuffer is not None:
+            GL.glDeleteFramebuffers(1, [self._framebuffer])
+            GL.glDeleteRenderbuffers(len(self._renderbuffers), self._renderbuffers)
+            self._framebuffer = None
+            self._renderbuffers = []
+        self.release()
+        self._impl.destroy()
+
+    def __enter__(self):
+        self.make_current()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def read_pixels(self):
+        """Reads the colour buffer as an array of uint8 RGBA pixels.
+
+        The shape is (width, height, 4), matching textures, with the
+        first row of pixels at the bottom of the image.
+        """
+        from OpenGL import GL
+        import numpy as np
+
+        data = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        GL.glReadPixels(0, 0, self.width, self.height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, data)
+        data.shape = (self.width, self.height, 4)
+        return data
+
+    def read_async(self, out=None):
+        """Reads the colour buffer without waiting for rendering to finish.
+
+        Returns a ReadbackFuture, whose result matches read_pixels and is
+        read into out if provided.
+        The context keeps a ReadbackRing with room for a few reads.
+        """
+        from .buffer.readback import ReadbackRing
+
+        if self._readback is None:
+            self._readback = ReadbackRing(self.width * self.height * 4)
+        return self._readback.read_pixels(0, 0, self.width, self.height, out=out)
+
+    @property
+    def framebuffer(self):
+        return self._framebuffer
+
+    @property
+    def renderer(self):
+        from OpenGL import GL
+        return GL.glGetString(GL.GL_RENDERER)
+
+    @property
+    def gl_version(self):
+        from OpenGL import GL
+        return GL.glGetString(GL.GL_VERSION)
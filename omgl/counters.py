@@ -0,0 +1,117 @@
+from __future__ import absolute_import
+from collections import defaultdict
+
+
+class Counters(object):
+    """Per-frame counters of OMGL operations.
+
+    Counting is disabled by default, when disabled each counted operation
+    only costs a single attribute check::
+
+        from omgl.counters import counters
+        counters.enabled = True
+
+        while running:
+            render()
+            counters.frame()
+            print(counters.snapshot()['draw_calls'])
+
+    The following are counted:
+        draw_calls, vertices, instances,
+        binds by target, program_switches, uniform_uploads,
+        bytes_uploaded and bytes_read by object type,
+        created and deleted by object type.
+    """
+    # the label used for each labelled counter in the text export
+    _label_names = {
+        'binds': 'target',
+    }
+
+    def __init__(self):
+        self.enabled = False
+        self.frames = 0
+        self._current = defaultdict(int)
+        self._last = {}
+        self._totals = defaultdict(int)
+
+    def add(self, name, value=1, label=None):
+        self._current[(name, label)] += value
+
+    def draw(self, vertices, instances=None, calls=1):
+        current = self._current
+        current[('draw_calls', None)] += calls
+        current[('vertices', None)] += vertices
+        current[('instances', None)] += instances if instances is not None else calls
+
+    def frame(self):
+        """Ends the current frame and returns its counts.
+        """
+        self._last = dict(self._current)
+        for key, value in self._last.items():
+            self._totals[key] += value
+        self._current.clear()
+        self.frames += 1
+        return self.snapshot()
+
+    def reset(self):
+        self.frames = 0
+        self._current.clear()
+        self._last = {}
+        self._totals.clear()
+
+    @classmethod
+    def _as_dict(cls, counts):
+        result = {}
+        for (name, label), value in counts.items():
+            if label is None:
+                result[name] = value
+            else:
+                result.setdefault(name, {})[label] = value
+        return result
+
+    def snapshot(self):
+        """Returns the counts of the last completed frame.
+
+        Labelled counters are returned as a dict of label: count.
+        """
+        return self._as_dict(self._last)
+
+    def current(self):
+        """Returns the counts of the frame in progress.
+        """
+        return self._as_dict(self._current)
+
+    def totals(self):
+        """Returns the counts of all completed frames.
+        """
+        return self._as_dict(self._totals)
+
+    def export_text(self, prefix='omgl'):
+        """Returns the last frame and total counts in the Prometheus text format.
+
+        Last frame counts are gauges, totals are counters with a _total suffix.
+        """
+        lines = []
+        for counts, suffix, metric_type in [
+            (self._last, '', 'gauge'),
+            (self._totals, '_total', 'counter'),
+        ]:
+            names = sorted(set(name for name, _ in counts.keys()))
+            for name in names:
+                metric = '{}_{}{}'.format(prefix, name, suffix)
+                lines.append('# TYPE {} {}'.format(metric, metric_type))
+                label_name = self._label_names.get(name, 'type')
+                for (_name, label), value in sorted(counts.items()):
+                    if _name != name:
+                        continue
+                    if label is None:
+                        lines.append('{} {}'.format(metric, value))
+                    else:
+                        lines.append('{}{{{}="{}"}} {}'.format(metric, label_name, label, value))
+
+        lines.append('# TYPE {}_frames_total counter'.format(prefix))
+        lines.append('{}_frames_total {}'.format(prefix, self.frames))
+        return '\n'.join(lines) + '\n'
+
+
+counters = Counters()
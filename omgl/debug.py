@@ -1,4 +1,10 @@
 from __future__ import absolute_import, print_function
+import re
+import sys
+import json
+import time
+import numbers
+import numpy as np
 from OpenGL import GL
 
 class FunctionPrinter(object):
@@ -23,22 +29,227 @@ def function_printer(fn):
         setattr(func, name, attr)
     return func
 
-def print_gl_calls(enable=True):
+def _gl_functions():
     for name in dir(GL):
         # ignore normal module values
-        if not name.startswith('gl'):
-            continue
+        if name.startswith('gl') and getattr(GL, name):
+            yield name
 
+def print_gl_calls(enable=True):
+    for name in _gl_functions():
         func = getattr(GL, name)
 
         if enable:
             # already patched
-            if hasattr(func, '_orig'):
+            if isinstance(func, FunctionPrinter):
                 continue
-
             func = function_printer(func)
         else:
-            if hasattr(func, '_orig'):
+            if not isinstance(func, FunctionPrinter):
                 continue
-            func = func._orig
+            func = func._original
         setattr(GL, name, func)
+
+
+_family_re = re.compile(r'gl([A-Z][a-z]*)')
+
+def call_family(name):
+    """Returns the family of an OpenGL function, the first word of its name.
+
+    For example, glDrawArrays is 'Draw' and glUniform4fv is 'Uniform'.
+    """
+    match = _family_re.match(name)
+    return match.group(1) if match else name
+
+def _summarise(arg):
+    if isinstance(arg, GL.constants.Constant):
+        return repr(arg)
+    if isinstance(arg, np.ndarray):
+        return 'ndarray({}, {})'.format(arg.shape, arg.dtype)
+    if isinstance(arg, numbers.Number) or arg is None:
+        return repr(arg)
+    value = repr(arg)
+    return value if len(value) <= 32 else value[:29] + '...'
+
+def _caller(frame):
+    # find the nearest omgl frame outside of this module
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith('omgl.') and module != __name__:
+            obj = frame.f_locals.get('self')
+            if obj is not None:
+                return '{}.{}'.format(obj.__class__.__name__, frame.f_code.co_name)
+            return '{}.{}'.format(module, frame.f_code.co_name)
+        frame = frame.f_back
+    return None
+
+
+class TracedFunction(object):
+    def __init__(self, fn, tracer):
+        self._original = fn
+        self._tracer = tracer
+        self.__name__ = fn.__name__
+
+    def __call__(self, *args, **kwargs):
+        start = time.time()
+        try:
+            return self._original(*args, **kwargs)
+        finally:
+            end = time.time()
+            self._tracer.record(self.__name__, args, start, end - start, _caller(sys._getframe(1)))
+
+    def __getattr__(self, name):
+        return getattr(self._original, name)
+
+
+class Tracer(object):
+    """Records OpenGL calls into a fixed size ring buffer.
+
+    Each call records its name, a summary of its arguments, its wall clock
+    start time and duration, and the OMGL object and method that issued it.
+    Once the buffer is full, the oldest calls are overwritten.
+
+    Families restrict tracing to functions of the given call families,
+    such as ['Draw', 'Bind', 'Uniform'], which reduces the overhead::
+
+        tracer = Tracer(families=['Draw', 'Bind'])
+        with tracer:
+            mesh.render()
+        tracer.save_chrome_trace('frame.json')
+
+    The trace can be viewed in chrome://tracing or Perfetto.
+
+    Functions are traced by replacing them in the OpenGL.GL module, and in the
+    attributes and proxies of OMGL classes.
+    Functions stored by objects themselves, such as the setters of program
+    uniforms loaded before tracing was enabled, are not traced.
+    """
+    def __init__(self, capacity=65536, families=None):
+        self.capacity = capacity
+        self.families = set(families) if families else None
+        self._names = [None] * capacity
+        self._args = [None] * capacity
+        self._callers = [None] * capacity
+        self._starts = np.zeros(capacity, dtype=np.float64)
+        self._durations = np.zeros(capacity, dtype=np.float64)
+        self._index = 0
+        self._count = 0
+        self._enabled = False
+        self._patches = []
+
+    def _patch(self, obj, name, traced):
+        value = getattr(obj, name, None)
+        try:
+            func = traced.get(id(value))
+        except TypeError:
+            return
+        if func is not None and func._original is value:
+            self._patches.append((obj, name, value))
+            setattr(obj, name, func)
+
+    def enable(self):
+        if self._enabled:
+            return
+
+        traced = {}
+        for name in _gl_functions():
+            if self.families and call_family(name) not in self.families:
+                continue
+            func = getattr(GL, name)
+            if isinstance(func, TracedFunction):
+                continue
+            traced[id(func)] = TracedFunction(func, self)
+            self._patch(GL, name, traced)
+
+        # OMGL classes and their proxies store functions when they are defined
+        from .proxy import Proxy
+        for module_name, module in list(sys.modules.items()):
+            if not module_name.startswith('omgl.') or module is None:
+                continue
+            for cls in list(vars(module).values()):
+                if not isinstance(cls, type) or cls.__module__ != module_name:
+                    continue
+                for name, value in list(vars(cls).items()):
+                    if isinstance(value, Proxy):
+                        for proxy_name in list(vars(value).keys()):
+                            self._patch(value, proxy_name, traced)
+                    else:
+                        self._patch(cls, name, traced)
+
+        self._enabled = True
+
+    def disable(self):
+        if not self._enabled:
+            return
+        for obj, name, func in reversed(self._patches):
+            setattr(obj, name, func)
+        self._patches = []
+        self._enabled = False
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    def record(self, name, args, start, duration, caller=None):
+        index = self._index
+        self._names[index] = name
+        self._args[index] = ', '.join(_summarise(arg) for arg in args)
+        self._callers[index] = caller
+        self._starts[index] = start
+        self._durations[index] = duration
+        self._index = (index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._index = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def events(self, families=None):
+        """Returns the recorded calls, oldest first, as a list of dicts.
+        """
+        families = set(families) if families else None
+        first = (self._index - self._count) % self.capacity
+        events = []
+        for offset in range(self._count):
+            index = (first + offset) % self.capacity
+            name = self._names[index]
+            family = call_family(name)
+            if families and family not in families:
+                continue
+            events.append({
+                'name': name,
+                'family': family,
+                'args': self._args[index],
+                'caller': self._callers[index],
+                'start': float(self._starts[index]),
+                'duration': float(self._durations[index]),
+            })
+        return events
+
+    def chrome_trace(self, families=None):
+        """Returns the recorded calls in the Chrome trace event format.
+        """
+        events = [{
+            'name': event['name'],
+            'cat': event['family'],
+            'ph': 'X',
+            'ts': event['start'] * 1e6,
+            'dur': event['duration'] * 1e6,
+            'pid': 0,
+            'tid': 0,
+            'args': {
+                'args': event['args'],
+                'caller': event['caller'],
+            },
+        } for event in self.events(families)]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, filename, families=None):
+        with open(filename, 'w') as f:
+            json.dump(self.chrome_trace(families), f)
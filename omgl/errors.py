@@ -0,0 +1,248 @@
+from __future__ import absolute_import
+import ctypes
+from collections import defaultdict
+from OpenGL import GL
+from OpenGL.raw.GL import _errors
+
+# no error checking
+OFF = 'off'
+# PyOpenGL checks glGetError after every call and raises GLError
+CALL = 'call'
+# errors are checked at the end of each scope and frame
+SCOPE = 'scope'
+# errors are delivered by the driver through KHR_debug
+CALLBACK = 'callback'
+
+modes = [OFF, CALL, SCOPE, CALLBACK]
+
+
+def _names(*names):
+    return dict((int(getattr(GL, name)), name) for name in names if hasattr(GL, name))
+
+_error_names = _names(
+    'GL_INVALID_ENUM',
+    'GL_INVALID_VALUE',
+    'GL_INVALID_OPERATION',
+    'GL_INVALID_FRAMEBUFFER_OPERATION',
+    'GL_OUT_OF_MEMORY',
+    'GL_STACK_UNDERFLOW',
+    'GL_STACK_OVERFLOW',
+)
+_source_names = _names(
+    'GL_DEBUG_SOURCE_API',
+    'GL_DEBUG_SOURCE_WINDOW_SYSTEM',
+    'GL_DEBUG_SOURCE_SHADER_COMPILER',
+    'GL_DEBUG_SOURCE_THIRD_PARTY',
+    'GL_DEBUG_SOURCE_APPLICATION',
+    'GL_DEBUG_SOURCE_OTHER',
+)
+_type_names = _names(
+    'GL_DEBUG_TYPE_ERROR',
+    'GL_DEBUG_TYPE_DEPRECATED_BEHAVIOR',
+    'GL_DEBUG_TYPE_UNDEFINED_BEHAVIOR',
+    'GL_DEBUG_TYPE_PORTABILITY',
+    'GL_DEBUG_TYPE_PERFORMANCE',
+    'GL_DEBUG_TYPE_MARKER',
+    'GL_DEBUG_TYPE_PUSH_GROUP',
+    'GL_DEBUG_TYPE_POP_GROUP',
+    'GL_DEBUG_TYPE_OTHER',
+)
+_severity_names = _names(
+    'GL_DEBUG_SEVERITY_HIGH',
+    'GL_DEBUG_SEVERITY_MEDIUM',
+    'GL_DEBUG_SEVERITY_LOW',
+    'GL_DEBUG_SEVERITY_NOTIFICATION',
+)
+
+
+class _ErrorScope(object):
+    def __init__(self, policy, name):
+        self._policy = policy
+        self._name = name
+
+    def __enter__(self):
+        self._policy.begin_scope(self._name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._policy.end_scope()
+
+
+class ErrorPolicy(object):
+    """Controls how OpenGL errors are detected.
+
+    Modes are:
+        OFF: errors are not checked.
+        CALL: PyOpenGL calls glGetError after every call and raises GLError, the default.
+        SCOPE: errors are checked at the end of each scope and frame and
+            counted against the scope they occurred in.
+        CALLBACK: the driver delivers errors and other messages through a
+            KHR_debug callback (GL 4.3), filtered by source, type and severity.
+
+    In all modes except CALL, errors are counted rather than raised
+    unless raise_errors is True::
+
+        from omgl.errors import error_policy, SCOPE
+        error_policy.set_mode(SCOPE)
+
+        with error_policy.scope('shadow'):
+            shadow_mesh.render()
+        error_policy.frame()
+
+        print(error_policy.counts())
+
+    Scopes are ignored outside of the SCOPE mode, so they can be left in place.
+    """
+    _max_errors = 32
+
+    def __init__(self):
+        self.mode = CALL
+        self.raise_errors = False
+        self._counts = defaultdict(int)
+        self._messages = {}
+        self._scopes = []
+        self._callback = None
+        self._checker = None
+
+    def set_mode(self, mode, sources=None, types=None, severities=None, synchronous=False):
+        """Changes the error mode.
+
+        For the CALLBACK mode, sources, types and severities are lists of
+        GL_DEBUG_SOURCE_*, GL_DEBUG_TYPE_* and GL_DEBUG_SEVERITY_* enums to receive,
+        by default all messages are received.
+        Synchronous callbacks are delivered by the thread and call that caused them,
+        at a cost to performance.
+        """
+        if mode not in modes:
+            raise ValueError('Unknown error mode {}'.format(mode))
+
+        if self.mode == CALLBACK:
+            self._disable_callback()
+
+        self._set_call_checking(mode == CALL)
+        if mode == CALLBACK:
+            self._enable_callback(sources, types, severities, synchronous)
+        self.mode = mode
+
+    def _set_call_checking(self, enabled):
+        checker = _errors._error_checker
+        if not checker:
+            return
+
+        if enabled:
+            if self._checker is not None:
+                checker._registeredChecker = checker._currentChecker = self._checker
+                self._checker = None
+        elif self._checker is None:
+            self._checker = checker._registeredChecker
+            checker._registeredChecker = checker._currentChecker = checker.nullGetError
+
+    def _enable_callback(self, sources, types, severities, synchronous):
+        # GL 4.3 / KHR_debug
+        # keep a reference to the callback so it isn't garbage collected
+        self._callback = GL.GLDEBUGPROC(self._on_message)
+        GL.glDebugMessageCallback(self._callback, None)
+
+        if sources or types or severities:
+            GL.glDebugMessageControl(GL.GL_DONT_CARE, GL.GL_DONT_CARE, GL.GL_DONT_CARE, 0, None, False)
+            for source in sources or [GL.GL_DONT_CARE]:
+                for type in types or [GL.GL_DONT_CARE]:
+                    for severity in severities or [GL.GL_DONT_CARE]:
+                        GL.glDebugMessageControl(source, type, severity, 0, None, True)
+        else:
+            GL.glDebugMessageControl(GL.GL_DONT_CARE, GL.GL_DONT_CARE, GL.GL_DONT_CARE, 0, None, True)
+
+        if synchronous:
+            GL.glEnable(GL.GL_DEBUG_OUTPUT_SYNCHRONOUS)
+        else:
+            GL.glDisable(GL.GL_DEBUG_OUTPUT_SYNCHRONOUS)
+        GL.glEnable(GL.GL_DEBUG_OUTPUT)
+
+    def _disable_callback(self):
+        GL.glDisable(GL.GL_DEBUG_OUTPUT)
+        GL.glDebugMessageCallback(GL.GLDEBUGPROC(0), None)
+        self._callback = None
+
+    def _on_message(self, source, type, id, severity, length, message, user_param):
+        key = (
+            _source_names.get(source, source),
+            _type_names.get(type, type),
+            _severity_names.get(severity, severity),
+            id,
+        )
+        self._counts[key] += 1
+        self._messages[key] = ctypes.string_at(message, length)
+
+    def check(self, scope=None):
+        """Reads all pending errors and counts them against the scope.
+
+        Returns a list of the error names.
+        By default, errors are counted against the current scope, or
+        'frame' outside of any scope.
+        """
+        if scope is None:
+            scope = self.scope_path or 'frame'
+
+        errors = []
+        for _ in range(self._max_errors):
+            error = GL.glGetError()
+            if error == GL.GL_NO_ERROR:
+                break
+            errors.append(_error_names.get(int(error), int(error)))
+
+        for error in errors:
+            self._counts[(scope, error)] += 1
+
+        if errors and self.raise_errors:
+            raise ValueError('OpenGL errors in {}: {}'.format(scope, ', '.join(map(str, errors))))
+        return errors
+
+    @property
+    def scope_path(self):
+        return '/'.join(self._scopes) if self._scopes else None
+
+    def scope(self, name):
+        return _ErrorScope(self, name)
+
+    def begin_scope(self, name):
+        if self.mode != SCOPE:
+            return
+        # errors before the scope belong to the enclosing scope
+        self.check()
+        self._scopes.append(name)
+
+    def end_scope(self):
+        if self.mode != SCOPE:
+            return
+        if not self._scopes:
+            raise ValueError('No scope in progress')
+        try:
+            self.check()
+        finally:
+            self._scopes.pop()
+
+    def frame(self):
+        """Checks for errors outside of any scope, call this once per frame.
+        """
+        if self.mode == SCOPE:
+            return self.check()
+        return []
+
+    def counts(self):
+        """Returns a dict of the number of each error.
+
+        Errors from glGetError are keyed by (scope, error name).
+        Callback messages are keyed by (source, type, severity, id).
+        """
+        return dict(self._counts)
+
+    def messages(self):
+        """Returns the last callback message for each key of counts.
+        """
+        return dict(self._messages)
+
+    def reset(self):
+        self._counts.clear()
+        self._messages.clear()
+
+
+error_policy = ErrorPolicy()
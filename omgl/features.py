@@ -0,0 +1,139 @@
+from __future__ import absolute_import
+from OpenGL import GL
+from OpenGL.GL.ARB import bindless_texture as _bindless_texture
+
+
+class Feature(object):
+    """An optional OpenGL code path.
+
+    Support is detected the first time the feature is tested, by checking
+    that all of its functions are provided by the driver.
+    This requires a current context, so features must not be tested at import time.
+
+    Features can be disabled to force OMGL to use the fallback code path::
+
+        from omgl import features
+        features.separate_attribute_format.enabled = False
+    """
+    def __init__(self, *functions):
+        self._functions = functions
+        self._supported = None
+        self.enabled = True
+
+    def __nonzero__(self):
+        return self.enabled and self.supported
+
+    __bool__ = __nonzero__
+
+    def reset(self):
+        self._supported = None
+
+    @property
+    def supported(self):
+        if self._supported is None:
+            self._supported = all(bool(func) for func in self._functions)
+        return self._supported
+
+
+# GL 4.3 / ARB_vertex_attrib_binding
+separate_attribute_format = Feature(
+    GL.glVertexAttribFormat,
+    GL.glVertexAttribIFormat,
+    GL.glVertexAttribLFormat,
+    GL.glVertexAttribBinding,
+    GL.glBindVertexBuffer,
+    GL.glVertexBindingDivisor,
+)
+
+# GL 4.5 / ARB_direct_state_access
+direct_state_access = Feature(
+    GL.glCreateBuffers,
+    GL.glNamedBufferData,
+    GL.glNamedBufferSubData,
+    GL.glGetNamedBufferSubData,
+    GL.glMapNamedBuffer,
+    GL.glMapNamedBufferRange,
+    GL.glUnmapNamedBuffer,
+    GL.glNamedBufferStorage,
+    GL.glCreateTextures,
+    GL.glTextureParameteri,
+    GL.glTextureParameterf,
+    GL.glTextureParameteriv,
+    GL.glGetTextureParameteriv,
+    GL.glGetTextureParameterfv,
+    GL.glTextureSubImage1D,
+    GL.glTextureSubImage2D,
+    GL.glTextureSubImage3D,
+    GL.glGetTextureImage,
+    GL.glCompressedTextureSubImage2D,
+    GL.glGetCompressedTextureImage,
+    GL.glGenerateTextureMipmap,
+    GL.glBindTextureUnit,
+    GL.glTextureStorage1D,
+    GL.glTextureStorage2D,
+    GL.glTextureStorage3D,
+    GL.glCreateVertexArrays,
+    GL.glEnableVertexArrayAttrib,
+    GL.glDisableVertexArrayAttrib,
+    GL.glVertexArrayAttribFormat,
+    GL.glVertexArrayAttribIFormat,
+    GL.glVertexArrayAttribLFormat,
+    GL.glVertexArrayAttribBinding,
+    GL.glVertexArrayVertexBuffer,
+    GL.glVertexArrayBindingDivisor,
+)
+
+# GL 4.2 / ARB_texture_storage
+immutable_storage = Feature(
+    GL.glTexStorage1D,
+    GL.glTexStorage2D,
+    GL.glTexStorage3D,
+)
+
+# GL 4.4 / ARB_buffer_storage
+buffer_storage = Feature(
+    GL.glBufferStorage,
+    GL.glMapBufferRange,
+)
+
+# GL 4.3 / KHR_debug
+debug_labels = Feature(
+    GL.glObjectLabel,
+)
+
+# GL 4.3 / KHR_debug
+# debug groups are emitted by pipelines and meshes, so are disabled by default
+debug_groups = Feature(
+    GL.glPushDebugGroup,
+    GL.glPopDebugGroup,
+)
+debug_groups.enabled = False
+
+# ARB_bindless_texture
+# shaders must enable the extension to use handles, so bindless textures are disabled by default
+bindless_texture = Feature(
+    _bindless_texture.glGetTextureHandleARB,
+    _bindless_texture.glGetTextureSamplerHandleARB,
+    _bindless_texture.glMakeTextureHandleResidentARB,
+    _bindless_texture.glMakeTextureHandleNonResidentARB,
+    _bindless_texture.glProgramUniformHandleui64ARB,
+)
+bindless_texture.enabled = False
+
+all_features = [
+    separate_attribute_format,
+    direct_state_access,
+    immutable_storage,
+    buffer_storage,
+    debug_labels,
+    debug_groups,
+    bindless_texture,
+]
+
+def reset():
+    """Re-detects support for all features.
+
+    Call this after changing to a context with different capabilities.
+    """
+    for feature in all_features:
+        feature.reset()
@@ -2,4 +2,5 @@ from __future__ import absolute_import, print_function
 
 
 from .mesh import *
+from .occlusion import *
 
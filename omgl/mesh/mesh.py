@@ -1,47 +1,90 @@
 from __future__ import absolute_import
 from OpenGL import GL
-from ..object import DescriptorMixin
-from ..buffer.vertex_array import VertexArray
+from ..object import DescriptorMixin, push_debug_group, pop_debug_group
+from ..buffer.vertex_array import VertexArray, vertex_array_cache
 from ..buffer.buffer_pointer import BufferPointer
+from .. import features
 
 
 class Mesh(DescriptorMixin):
-    def __init__(self, pipeline, indices=None, primitive=GL.GL_TRIANGLES, **pointers):
+    """Renders vertex data with a pipeline.
+
+    By default, meshes with identical layouts share a vertex array from the
+    vertex array cache.
+    Pass vertex_arrays=None to give the mesh its own vertex array, which is
+    updated in place when the mesh's pointers change.
+    """
+    def __init__(self, pipeline, indices=None, primitive=GL.GL_TRIANGLES, instances=None, vertex_arrays=vertex_array_cache, label=None, **pointers):
         self._pointers = pointers
+        self.label = label
         self._pipeline = pipeline
         self.primitive = primitive
         self.indices = indices
+        self.instances = instances
+        self.occlusion = None
 
         for pointer in pointers.values():
             if not isinstance(pointer, BufferPointer):
                 raise ValueError('Must be of type BufferPointer')
 
-        self._vertex_array = VertexArray()
+        self._vertex_arrays = vertex_arrays
+        # shared vertex arrays aren't labelled, as they belong to many meshes
+        self._vertex_array = VertexArray(label=label) if vertex_arrays is None else None
         self._bind_pointers()
 
     def _bind_pointers(self):
-        # TODO: make this more efficient, don't just clear all pointers
-        self._vertex_array.clear()
-
-        # assign our pointers to the vertex array
+        # map our pointers to the program's attribute locations
+        # the vertex array only updates the attributes that have changed
+        pointers = {}
         for name, pointer in self._pointers.items():
             if not isinstance(pointer, BufferPointer):
                 raise ValueError('Must be a buffer pointer')
 
             attribute = self._pipeline.program.attributes.get(name)
             if attribute:
-                self._vertex_array[attribute.location] = pointer
+                pointers[attribute.location] = pointer
+
+        if self._vertex_arrays is not None:
+            self._vertex_array = self._vertex_arrays.get(pointers)
+        else:
+            self._vertex_array.set_pointers(pointers)
+
+    def set_pointers(self, **pointers):
+        """Updates the named pointers, leaving any others unchanged.
+
+        Pointers with the same format as the pointer they replace only
+        re-bind their buffer.
+        """
+        for pointer in pointers.values():
+            if not isinstance(pointer, BufferPointer):
+                raise ValueError('Must be of type BufferPointer')
+
+        self._pointers.update(pointers)
+        self._bind_pointers()
 
     def render(self, **uniforms):
+        if features.debug_groups:
+            push_debug_group(self.label or self.__class__.__name__)
+
+        try:
+            if self.occlusion is not None:
+                self.occlusion.render(self, **uniforms)
+            else:
+                self._render(**uniforms)
+        finally:
+            if features.debug_groups:
+                pop_debug_group()
+
+    def _render(self, **uniforms):
         # set our uniforms
         self._pipeline.set_uniforms(**uniforms)
 
         # render
         with self._pipeline:
             if self.indices is not None:
-                self._vertex_array.render_indices(self.indices, self.primitive)
+                self._vertex_array.render_indices(self.indices, self.primitive, instances=self.instances)
             else:
-                self._vertex_array.render(self.primitive)
+                self._vertex_array.render(self.primitive, instances=self.instances)
 
     @property
     def pipeline(self):
@@ -52,6 +95,10 @@ class Mesh(DescriptorMixin):
         self._pipeline = pipeline
         self._bind_pointers()
 
+    @property
+    def pointers(self):
+        return dict(self._pointers)
+
     @property
     def vertex_array(self):
         return self._vertex_array
@@ -0,0 +1,136 @@
+from __future__ import absolute_import
+from OpenGL import GL
+import numpy as np
+from .mesh import Mesh
+from ..buffer.buffer import VertexBuffer
+from ..query.query import AnySamplesPassedQuery, AnySamplesPassedConservativeQuery
+from ..query.profiler import Profiler
+
+
+class ConditionalRender(object):
+    """Skips the rendering commands issued within it on the GPU if the
+    occlusion query passed no samples.
+
+    The CPU never reads the query result.
+    With GL_QUERY_NO_WAIT, rendering is performed if the result isn't available yet.
+    """
+    def __init__(self, query, mode=GL.GL_QUERY_NO_WAIT):
+        self.query = query
+        self.mode = mode
+
+    def __enter__(self):
+        GL.glBeginConditionalRender(self.query.handle, self.mode)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        GL.glEndConditionalRender()
+
+
+def bounding_box(pipeline, minimum, maximum, name='in_position'):
+    """Creates a box mesh for use as an occlusion proxy.
+
+    The vertex positions are provided to the named attribute of the pipeline's program.
+    """
+    minimum = np.asarray(minimum, dtype=np.float32)
+    maximum = np.asarray(maximum, dtype=np.float32)
+
+    # corners of the box, indexed by the bits of the index (x, y, z)
+    corners = np.array([
+        [maximum[0] if i & 1 else minimum[0],
+         maximum[1] if i & 2 else minimum[1],
+         maximum[2] if i & 4 else minimum[2],]
+        for i in range(8)
+    ], dtype=np.float32)
+    indices = np.array([
+        0,2,1, 1,2,3,   # -z
+        4,5,6, 5,7,6,   # +z
+        0,1,4, 1,5,4,   # -y
+        2,6,3, 3,6,7,   # +y
+        0,4,2, 2,4,6,   # -x
+        1,3,5, 3,7,5,   # +x
+    ])
+    vertices = VertexBuffer(corners[indices])
+    return Mesh(pipeline, **{name: vertices.pointers[0]})
+
+
+class Occlusion(object):
+    """Occlusion culling for a mesh.
+
+    A proxy mesh, usually a bounding box, is rendered within an occlusion
+    query with colour and depth writes disabled.
+    The mesh is then rendered conditionally on the result of the query,
+    on the GPU, without reading the result back.
+
+    In temporal mode, the mesh is rendered conditionally on the previous
+    frame's query, so the proxy doesn't need to be rendered first.
+    Newly visible meshes appear one frame late.
+
+    Assign an occlusion to a mesh to use it automatically::
+
+        proxy = bounding_box(proxy_pipeline, mesh_min, mesh_max)
+        mesh.occlusion = Occlusion(proxy, temporal=True)
+        mesh.render(in_projection=projection, in_model_view=model_view)
+
+    The uniforms passed to Mesh.render are also passed to the proxy.
+
+    Occlusion and samples passed queries can't be active at the same time,
+    so a Profiler counting statistics has its samples query suspended during
+    each test, and tests can't be made within other occlusion queries.
+    """
+    def __init__(self, proxy, temporal=False, mode=GL.GL_QUERY_NO_WAIT, conservative=True):
+        self.proxy = proxy
+        self.temporal = temporal
+        self.mode = mode
+
+        # GL 4.3
+        query_type = AnySamplesPassedConservativeQuery if conservative else AnySamplesPassedQuery
+        self._queries = [query_type(), query_type()]
+        self._previous = None
+
+    def test(self, **uniforms):
+        """Renders the proxy within an occlusion query and returns the query.
+        """
+        # alternate queries so the previous frame's result remains available
+        query = self._queries[0] if self._previous is not self._queries[0] else self._queries[1]
+
+        # the proxy may surround the camera, so render its back faces as well
+        # restore the caller's masks, which may be disabled for depth pre-passes or transparency
+        cull_face = GL.glIsEnabled(GL.GL_CULL_FACE)
+        depth_mask = bool(GL.glGetBooleanv(GL.GL_DEPTH_WRITEMASK))
+        color_mask = [bool(value) for value in GL.glGetBooleanv(GL.GL_COLOR_WRITEMASK)]
+        if cull_face:
+            GL.glDisable(GL.GL_CULL_FACE)
+        GL.glColorMask(False, False, False, False)
+        GL.glDepthMask(False)
+
+        try:
+            with Profiler.suspend_samples(), query:
+                self.proxy.render(**uniforms)
+        finally:
+            GL.glDepthMask(depth_mask)
+            GL.glColorMask(*color_mask)
+            if cull_face:
+                GL.glEnable(GL.GL_CULL_FACE)
+
+        self._previous = query
+        return query
+
+    def render(self, mesh, **uniforms):
+        """Renders the mesh if the proxy is visible.
+        """
+        if self.temporal:
+            query = self._previous
+            if query is None:
+                mesh._render(**uniforms)
+            else:
+                with ConditionalRender(query, self.mode):
+                    mesh._render(**uniforms)
+            self.test(**uniforms)
+        else:
+            query = self.test(**uniforms)
+            with ConditionalRender(query, self.mode):
+                mesh._render(**uniforms)
+
+    def reset(self):
+        """Discards the previous result, the next temporal render is unconditional.
+        """
+        self._previous = None
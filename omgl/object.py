@@ -1,4 +1,8 @@
 from __future__ import absolute_import
+import numpy as np
+from OpenGL import GL
+from . import features
+from .counters import counters
 
 
 class DescriptorMixin(object):
@@ -23,9 +27,20 @@ class GL_Object(object):
         super(GL_Object, self).__init__()
 
 
+def push_debug_group(name):
+    # GL 4.3 / KHR_debug
+    GL.glPushDebugGroup(GL.GL_DEBUG_SOURCE_APPLICATION, 0, len(name), name)
+
+def pop_debug_group():
+    GL.glPopDebugGroup()
+
+
 class ManagedObject(GL_Object):
     _create_func = None
+    _dsa_create_func = None
     _delete_func = None
+    _label_identifier = None
+    _label = None
 
     def __init__(self, handle=None, **kwargs):
         super(ManagedObject, self).__init__(handle=handle, **kwargs)
@@ -34,6 +49,20 @@ class ManagedObject(GL_Object):
     def _create(self, handle):
         if handle:
             self._handle = handle
+        elif self._dsa_create_func is not None and features.direct_state_access:
+            # GL 4.5
+            # direct state access requires objects created by glCreate*
+            # glGen* only reserves a name until the object is first bound
+            handles = np.zeros(1, dtype=np.uint32)
+            func = self._dsa_create_func
+            if hasattr(self._dsa_create_func, 'wrappedOperation'):
+                func = self._dsa_create_func.wrappedOperation
+
+            if len(func.argNames) == 3:
+                self._dsa_create_func(self._target, 1, handles)
+            else:
+                self._dsa_create_func(1, handles)
+            self._handle = handles[0]
         else:
             func = self._create_func
             if hasattr(self._create_func, 'wrappedOperation'):
@@ -46,6 +75,13 @@ class ManagedObject(GL_Object):
             else:
                 self._handle = self._create_func()
 
+            # some glGen* functions return an array of handles
+            if hasattr(self._handle, '__len__'):
+                self._handle = self._handle[0]
+
+        if counters.enabled and not handle:
+            counters.add('created', label=self.__class__.__name__)
+
     def __del__(self):
         self._destroy()
 
@@ -60,6 +96,9 @@ class ManagedObject(GL_Object):
             else:
                 self._delete_func(self._handle)
             self._handle = None
+
+            if counters.enabled:
+                counters.add('deleted', label=self.__class__.__name__)
         except:
             pass
 
@@ -67,6 +106,17 @@ class ManagedObject(GL_Object):
     def handle(self):
         return self._handle
 
+    @property
+    def label(self):
+        return self._label
+
+    @label.setter
+    def label(self, label):
+        # the object must exist, generated names must be bound before they are labelled
+        self._label = label
+        if label and self._label_identifier is not None and features.debug_labels:
+            GL.glObjectLabel(self._label_identifier, self._handle, len(label), label)
+
 
 class BindableObject(GL_Object):
     _bind_function = None
@@ -76,6 +126,9 @@ class BindableObject(GL_Object):
         super(BindableObject, self).__init__(**kwargs)
 
     def bind(self):
+        if counters.enabled:
+            counters.add('binds', label=getattr(self._target, 'name', None) or self.__class__.__name__)
+
         func = self._bind_func
         if hasattr(self._bind_func, 'wrappedOperation'):
             func = self._bind_func.wrappedOperation
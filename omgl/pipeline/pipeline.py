@@ -1,22 +1,27 @@
 from __future__ import absolute_import
-from ..object import BindableObject, DescriptorMixin
+from ..object import BindableObject, DescriptorMixin, push_debug_group, pop_debug_group
 from ..texture.texture import Texture
+from ..texture.units import texture_units
 from ..buffer.buffer import TextureBuffer
+from .. import features
 
 # TODO: iterate through properties
 # if texture, create a sampler
 # provide list of texture properties
 
 class Pipeline(DescriptorMixin, BindableObject):
-    def __init__(self, program, **properties):
+    def __init__(self, program, label=None, samplers=None, **properties):
         self._program = program
+        self._label = label
+        self._samplers = dict(samplers or {})
 
         self._properties = set(properties.keys())
         for name, value in properties.items():
             setattr(self, name, value)
 
     def __setattr__(self, name, value):
-        if name[0] is not '_':
+        # class properties, such as label, aren't uniforms
+        if name[0] is not '_' and not isinstance(getattr(self.__class__, name, None), property):
             self._properties.add(name)
         object.__setattr__(self, name, value)
 
@@ -26,44 +31,83 @@ class Pipeline(DescriptorMixin, BindableObject):
         object.__delattr__(self, name)
 
     def bind(self):
-        # set our local properties as uniforms
-        # bind the textures
-        uniforms = dict((name, getattr(self, name)) for name in self._properties)
-        self.set_uniforms(**uniforms)
+        if features.debug_groups:
+            push_debug_group(self._label or self.__class__.__name__)
 
-        # bind our shader
-        self._program.bind()
+        try:
+            # set our local properties as uniforms
+            # bind the textures
+            uniforms = dict((name, getattr(self, name)) for name in self._properties)
+            self.set_uniforms(**uniforms)
+
+            # bind our shader
+            self._program.bind()
+        except:
+            # unbind isn't called if bind fails, so pop the group here
+            if features.debug_groups:
+                pop_debug_group()
+            raise
 
     def unbind(self):
-        # unbind the textures
-        for name in self._properties:
-            value = getattr(self, name)
-            if isinstance(value, Texture):
-                unit = getattr(self._program, name)
-                if unit is not None:
-                    Texture.active_unit = unit
-                    value.unbind()
-
-        # unbind the shader
-        self._program.unbind()
+        # textures are left bound, so the next pipeline using them doesn't re-bind them
+        # samplers are unbound, so they don't override the parameters of textures bound later
+
+        try:
+            if self._samplers and not features.bindless_texture:
+                units = self._program.texture_units
+                for name in self._samplers:
+                    if name in units:
+                        texture_units.unbind_sampler(units[name])
+
+            # unbind the shader
+            self._program.unbind()
+        finally:
+            if features.debug_groups:
+                pop_debug_group()
 
     def set_uniforms(self, **uniforms):
+        # checking the uniform store avoids reading the uniform's value from the program
+        program_uniforms = self._program.uniforms
         for name, value in uniforms.items():
-            if hasattr(self._program, name):
+            if name in program_uniforms:
                 if isinstance(value, TextureBuffer):
                     value = value.texture
                 if isinstance(value, Texture):
-                    unit = getattr(self._program, name)
-                    if unit is not None:
-                        Texture.active_unit = unit
-                        value.bind()
+                    self._set_texture(name, value)
                 else:
                     setattr(self._program, name, value)
 
+    def _set_texture(self, name, texture):
+        # the sampler overrides the texture's own parameters
+        sampler = self._samplers.get(name)
+        if features.bindless_texture:
+            # ARB_bindless_texture
+            self._program.set_texture_handle(name, texture.bindless_handle(sampler))
+            return
+
+        # units are assigned by the program once, and textures already bound aren't bound again
+        unit = self._program.texture_units.get(name)
+        if unit is not None:
+            texture_units.bind(unit, texture, sampler)
+
     @property
     def program(self):
         return self._program
 
+    @property
+    def label(self):
+        return self._label
+
+    @label.setter
+    def label(self, label):
+        self._label = label
+
+    @property
+    def samplers(self):
+        """A dict of texture uniform name to the Sampler used with that texture.
+        """
+        return self._samplers
+
     @property
     def properties(self):
         return dict((name, getattr(self, name)) for name in self._properties)
@@ -0,0 +1,5 @@
+from __future__ import absolute_import, print_function
+
+
+from .query import *
+from .profiler import *
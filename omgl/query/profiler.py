@@ -0,0 +1,325 @@
+from __future__ import absolute_import
+from collections import deque, defaultdict
+from .query import TimestampQuery, PrimitivesGeneratedQuery, SamplesPassedQuery
+
+
+class ScopeStats(object):
+    """Rolling per-frame statistics for a profiler scope.
+
+    Times are the total GPU time, in milliseconds, spent in the scope each frame.
+    """
+    def __init__(self, history):
+        self.times = deque(maxlen=history)
+        self.calls = deque(maxlen=history)
+        self.primitives = deque(maxlen=history)
+        self.samples = deque(maxlen=history)
+
+    def add(self, time, calls, primitives=None, samples=None):
+        self.times.append(time)
+        self.calls.append(calls)
+        if primitives is not None:
+            self.primitives.append(primitives)
+        if samples is not None:
+            self.samples.append(samples)
+
+    @property
+    def last(self):
+        return self.times[-1] if self.times else 0.
+
+    @property
+    def mean(self):
+        return sum(self.times) / len(self.times) if self.times else 0.
+
+    @property
+    def min(self):
+        return min(self.times) if self.times else 0.
+
+    @property
+    def max(self):
+        return max(self.times) if self.times else 0.
+
+    def as_dict(self):
+        result = {
+            'last': self.last,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'calls': self.calls[-1] if self.calls else 0,
+        }
+        if self.primitives:
+            result['primitives'] = self.primitives[-1]
+        if self.samples:
+            result['samples'] = self.samples[-1]
+        return result
+
+
+class _Record(object):
+    def __init__(self, path):
+        self.path = path
+        self.start = None
+        self.end = None
+        self.primitives = None
+        self.samples = None
+
+
+class _Scope(object):
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._profiler.begin_scope(self._name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler.end_scope()
+
+
+class _Frame(_Scope):
+    def __enter__(self):
+        self._profiler.begin_frame(self._name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler.end_frame()
+
+
+class _SuspendSamples(object):
+    def __enter__(self):
+        self._profiler = Profiler._sampling
+        if self._profiler is not None:
+            self._profiler._suspend_samples()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._profiler is not None:
+            self._profiler._resume_samples()
+
+
+class Profiler(object):
+    """Hierarchical GPU profiler using timestamp queries.
+
+    Scopes are nested within a frame and are identified by their path,
+    such as 'frame/shadow/Mesh.render'::
+
+        profiler = Profiler()
+        with profiler.frame():
+            with profiler.scope('shadow'):
+                mesh.render()
+
+        print(profiler.report())
+
+    Query results are collected once a frame is latency frames old and the GPU
+    has finished it, so collecting results never stalls the pipeline.
+    Query objects are recycled once their results are read.
+
+    If statistics is True, the outermost scope of each frame also counts
+    the primitives generated and samples passed.
+    Samples passed and occlusion queries can't be active at the same time,
+    so occlusion tests suspend the samples query, and their proxies aren't counted.
+    Scopes outside of a frame are ignored.
+    """
+    _instrumented = None
+    # the profiler whose samples passed query is active
+    _sampling = None
+
+    def __init__(self, history=60, latency=2, statistics=False):
+        self.history = history
+        self.latency = latency
+        self.statistics = statistics
+        self._pool = defaultdict(list)
+        self._pending = deque()
+        self._frame = None
+        self._stack = []
+        self._statistics_scope = None
+        self._stats = {}
+
+    def _acquire(self, cls):
+        pool = self._pool[cls]
+        return pool.pop() if pool else cls()
+
+    def _release(self, query):
+        if query is not None:
+            self._pool[query.__class__].append(query)
+
+    def frame(self, name='frame'):
+        return _Frame(self, name)
+
+    def scope(self, name):
+        return _Scope(self, name)
+
+    def begin_frame(self, name='frame'):
+        if self._frame is not None:
+            raise ValueError('Frame already in progress')
+        self._frame = []
+        self.begin_scope(name)
+
+    def end_frame(self):
+        if self._frame is None:
+            raise ValueError('No frame in progress')
+
+        # close any scopes left open
+        while self._stack:
+            self.end_scope()
+
+        self._pending.append(self._frame)
+        self._frame = None
+        self.collect()
+
+    def begin_scope(self, name):
+        if self._frame is None:
+            self._stack.append(None)
+            return
+
+        parent = self._stack[-1] if self._stack else None
+        path = '/'.join([parent.path, name]) if parent else name
+
+        record = _Record(path)
+        record.start = self._acquire(TimestampQuery)
+        record.start.record()
+
+        # statistics queries can't be nested
+        # so only the outermost scope can use them
+        if self.statistics and self._statistics_scope is None:
+            record.primitives = self._acquire(PrimitivesGeneratedQuery)
+            record.primitives.begin()
+            record.samples = []
+            self._statistics_scope = record
+            self._resume_samples()
+
+        self._stack.append(record)
+        self._frame.append(record)
+
+    def end_scope(self):
+        if not self._stack:
+            raise ValueError('No scope in progress')
+
+        record = self._stack.pop()
+        if record is None:
+            return
+
+        if record is self._statistics_scope:
+            record.primitives.end()
+            self._suspend_samples()
+            self._statistics_scope = None
+
+        record.end = self._acquire(TimestampQuery)
+        record.end.record()
+
+    def _suspend_samples(self):
+        self._statistics_scope.samples[-1].end()
+        Profiler._sampling = None
+
+    def _resume_samples(self):
+        # samples are counted by a new query after each suspension, and summed
+        query = self._acquire(SamplesPassedQuery)
+        query.begin()
+        self._statistics_scope.samples.append(query)
+        Profiler._sampling = self
+
+    @classmethod
+    def suspend_samples(cls):
+        """Returns a context manager which suspends the active samples passed query,
+        so an occlusion query can be used within it.
+        """
+        return _SuspendSamples()
+
+    def collect(self, wait=False):
+        """Reads the results of frames the GPU has completed.
+
+        If wait is True, all pending frames are read, which may stall.
+        """
+        while self._pending:
+            frame = self._pending[0]
+            if not wait:
+                if len(self._pending) <= self.latency:
+                    break
+                # the frame's root scope ends last
+                # once it is available, so are the rest of the frame's queries
+                if not frame[0].end.available:
+                    break
+
+            self._pending.popleft()
+            self._process(frame)
+
+    def _process(self, frame):
+        totals = {}
+        for record in frame:
+            time = (record.end.result - record.start.result) / 1e6
+            total = totals.setdefault(record.path, [0., 0, None, None])
+            total[0] += time
+            total[1] += 1
+            if record.primitives is not None:
+                total[2] = (total[2] or 0) + record.primitives.result
+                total[3] = (total[3] or 0) + sum(query.result for query in record.samples)
+
+            for query in [record.start, record.end, record.primitives] + (record.samples or []):
+                self._release(query)
+
+        for path, (time, calls, primitives, samples) in totals.items():
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = ScopeStats(self.history)
+            stats.add(time, calls, primitives, samples)
+
+    def results(self):
+        """Returns a dict of scope path: statistics.
+        """
+        return dict((path, stats.as_dict()) for path, stats in self._stats.items())
+
+    def report(self):
+        lines = []
+        for path in sorted(self._stats.keys()):
+            stats = self._stats[path]
+            depth = path.count('/')
+            name = path.split('/')[-1]
+            lines.append('{indent}{name}: {last:.3f}ms (mean {mean:.3f}, min {min:.3f}, max {max:.3f}) x{calls}'.format(
+                indent='  ' * depth,
+                name=name,
+                **stats.as_dict()
+            ))
+        return '\n'.join(lines)
+
+    def reset(self):
+        self._stats = {}
+
+    def instrument(self):
+        """Wraps Mesh.render and Pipeline bind / unbind in profiler scopes.
+        """
+        from ..mesh.mesh import Mesh
+        from ..pipeline.pipeline import Pipeline
+
+        if Profiler._instrumented is not None:
+            raise ValueError('A profiler is already instrumenting OMGL')
+
+        render = Mesh.__dict__['render']
+        bind = Pipeline.__dict__['bind']
+        unbind = Pipeline.__dict__['unbind']
+        profiler = self
+
+        def profiled_render(mesh, **uniforms):
+            profiler.begin_scope('Mesh.render')
+            try:
+                return render(mesh, **uniforms)
+            finally:
+                profiler.end_scope()
+
+        def profiled_bind(pipeline):
+            profiler.begin_scope('Pipeline')
+            bind(pipeline)
+
+        def profiled_unbind(pipeline):
+            unbind(pipeline)
+            profiler.end_scope()
+
+        Mesh.render = profiled_render
+        Pipeline.bind = profiled_bind
+        Pipeline.unbind = profiled_unbind
+        Profiler._instrumented = (self, render, bind, unbind)
+
+    def uninstrument(self):
+        from ..mesh.mesh import Mesh
+        from ..pipeline.pipeline import Pipeline
+
+        if Profiler._instrumented is None or Profiler._instrumented[0] is not self:
+            raise ValueError('Profiler is not instrumenting OMGL')
+
+        _, Mesh.render, Pipeline.bind, Pipeline.unbind = Profiler._instrumented
+        Profiler._instrumented = None
@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+from OpenGL import GL
+from OpenGL.raw.GL.VERSION import GL_3_3
+from ..object import ManagedObject
+
+
+class Query(ManagedObject):
+    """Asynchronous query object.
+
+    Results are written by the GPU some time after the query ends.
+    Check available before reading the result to avoid stalling.
+    """
+    _create_func = GL.glGenQueries
+    _dsa_create_func = GL.glCreateQueries
+    _delete_func = GL.glDeleteQueries
+    _target = None
+
+    def __init__(self):
+        super(Query, self).__init__()
+
+    def begin(self):
+        GL.glBeginQuery(self._target, self._handle)
+
+    def end(self):
+        GL.glEndQuery(self._target)
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end()
+
+    @property
+    def available(self):
+        return bool(GL.glGetQueryObjectiv(self._handle, GL.GL_QUERY_RESULT_AVAILABLE))
+
+    @property
+    def result(self):
+        """The query result, this will block until the result is available.
+        """
+        # BUG IN PYOPENGL!
+        # glGetQueryObjectui64v can't allocate a GLuint64 output array
+        # use the non-wrapped version
+        value = GL.GLuint64()
+        GL_3_3.glGetQueryObjectui64v(self._handle, GL.GL_QUERY_RESULT, value)
+        return value.value
+
+    @property
+    def target(self):
+        return self._target
+
+
+class TimeElapsedQuery(Query):
+    """Nanoseconds taken by the GPU to execute the commands in the query.
+
+    Time elapsed queries cannot be nested, use TimestampQuery instead.
+    """
+    _target = GL.GL_TIME_ELAPSED
+
+class TimestampQuery(Query):
+    """The GPU time, in nanoseconds, once all previous commands have completed.
+    """
+    _target = GL.GL_TIMESTAMP
+
+    def begin(self):
+        raise ValueError('Timestamp queries are recorded with record()')
+
+    def end(self):
+        raise ValueError('Timestamp queries are recorded with record()')
+
+    def record(self):
+        GL.glQueryCounter(self._handle, self._target)
+
+class PrimitivesGeneratedQuery(Query):
+    _target = GL.GL_PRIMITIVES_GENERATED
+
+class SamplesPassedQuery(Query):
+    _target = GL.GL_SAMPLES_PASSED
+
+class AnySamplesPassedQuery(Query):
+    _target = GL.GL_ANY_SAMPLES_PASSED
+
+class AnySamplesPassedConservativeQuery(Query):
+    _target = GL.GL_ANY_SAMPLES_PASSED_CONSERVATIVE
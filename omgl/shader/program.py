@@ -1,15 +1,17 @@
 from __future__ import absolute_import
 from OpenGL import GL
+from OpenGL.GL.ARB import bindless_texture
 import numpy as np
 from .variables import ProgramVariable, Attribute, Uniform
 from ..object import ManagedObject, BindableObject, DescriptorMixin
 from ..proxy import Integer32Proxy
 from ..proxy import Proxy
+from ..counters import counters
+from ..context import PerContext
 
 """
 TODO: https://www.opengl.org/registry/specs/ARB/separate_shader_objects.txt
 TODO: https://www.opengl.org/registry/specs/ARB/shading_language_include.txt
-TODO: https://www.opengl.org/registry/specs/ARB/sampler_objects.txt
 """
 
 class ProgramProxy(Proxy):
@@ -36,11 +38,17 @@ class VariableStore(DescriptorMixin, dict):
         super(VariableStore, self).__setitem__(index, value)
 
 
+# the handle of the program last bound in each context
+_bound_program = PerContext(dict)
+
+
 class Program(DescriptorMixin, BindableObject, ManagedObject):
     _create_func = GL.glCreateProgram
     _delete_func = GL.glDeleteProgram
     _bind_func = GL.glUseProgram
+    _label_identifier = GL.GL_PROGRAM
     _current_program = Integer32Proxy(GL.GL_CURRENT_PROGRAM, bind=False)
+    max_texture_units = Integer32Proxy(GL.GL_MAX_COMBINED_TEXTURE_IMAGE_UNITS)
 
     active_attribute_max_length = ProgramProxy(GL.GL_ACTIVE_ATTRIBUTE_MAX_LENGTH)
     active_attributes = ProgramProxy(GL.GL_ACTIVE_ATTRIBUTES)
@@ -49,11 +57,13 @@ class Program(DescriptorMixin, BindableObject, ManagedObject):
     link_status = ProgramProxy(GL.GL_LINK_STATUS, dtype=np.bool)
     delete_status = ProgramProxy(GL.GL_DELETE_STATUS, dtype=np.bool)
 
-    def __init__(self, shaders, frag_locations=None, **attributes):
+    def __init__(self, shaders, frag_locations=None, label=None, **attributes):
         super(Program, self).__init__()
         self._loaded = False
         self._attributes = None
         self._uniforms = None
+        self._texture_units = None
+        self._texture_handles = {}
 
         for shader in shaders:
             self._attach(shader)
@@ -70,6 +80,11 @@ class Program(DescriptorMixin, BindableObject, ManagedObject):
 
         self._link()
 
+        # label before the program is marked as loaded
+        # so the assignment doesn't load the program's variables
+        if label:
+            self.label = label
+
         # detach shaders so they can be free'ed by opengl
         for shader in shaders:
             self._detach(shader)
@@ -106,6 +121,17 @@ class Program(DescriptorMixin, BindableObject, ManagedObject):
             pass
         return super(Program, self).__setattr__(name, value)
 
+    def bind(self):
+        bound = _bound_program.instance
+        if counters.enabled and bound.get('handle') != self._handle:
+            counters.add('program_switches')
+        bound['handle'] = self._handle
+        super(Program, self).bind()
+
+    def unbind(self):
+        _bound_program.instance['handle'] = None
+        super(Program, self).unbind()
+
     def _attach(self, shader):
         GL.glAttachShader(self._handle, shader.handle)
 
@@ -152,6 +178,39 @@ class Program(DescriptorMixin, BindableObject, ManagedObject):
         self._load_active_attributes()
         self._load_active_uniforms()
 
+    def _assign_texture_units(self):
+        samplers = sorted(
+            (uniform for uniform in self.uniforms.values() if 'SAMPLER' in uniform.enum.name),
+            key=lambda uniform: uniform.index
+        )
+
+        # units set in the shader, with layout(binding=...), or before first use, are kept
+        # if they're distinct, otherwise units are assigned in order
+        current = [np.ravel(uniform.data).tolist() for uniform in samplers]
+        flattened = sum(current, [])
+        if len(set(flattened)) == len(flattened):
+            return dict((uniform.name, units[0]) for uniform, units in zip(samplers, current))
+
+        if len(flattened) > self.max_texture_units:
+            raise ValueError('Program uses more textures than there are texture units')
+
+        units = {}
+        unit = 0
+        for uniform in samplers:
+            uniform.data = list(range(unit, unit + uniform.length))
+            units[uniform.name] = unit
+            unit += uniform.length
+        return units
+
+    def set_texture_handle(self, name, handle):
+        """Sets a sampler uniform to an ARB_bindless_texture handle, the program needn't be bound.
+
+        Unchanged handles aren't uploaded again.
+        """
+        if self._texture_handles.get(name) != handle:
+            bindless_texture.glProgramUniformHandleui64ARB(self._handle, self.uniforms[name].location, handle)
+            self._texture_handles[name] = handle
+
     def _set_frag_location(self, name, number):
         GL.glBindFragDataLocation(self._handle, number, name)
 
@@ -167,6 +226,17 @@ class Program(DescriptorMixin, BindableObject, ManagedObject):
             self._load_variables()
         return self._uniforms
 
+    @property
+    def texture_units(self):
+        """The texture unit of each sampler uniform, arrays of samplers use consecutive units.
+
+        Units are assigned when first needed, instead of being read from
+        the program for every bind, and are read again after a sampler uniform is set.
+        """
+        if self._texture_units is None:
+            self._texture_units = self._assign_texture_units()
+        return self._texture_units
+
     @property
     def valid(self):
         return bool(GL.glValidateProgram(self._handle))
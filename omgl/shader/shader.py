@@ -78,22 +78,26 @@ class ShaderError(object):
 class Shader(ManagedObject):
     _create_func = GL.glCreateShader
     _delete_func = GL.glDeleteShader
+    _label_identifier = GL.GL_SHADER
 
     compile_status = ShaderProxy(GL.GL_COMPILE_STATUS, dtype=np.bool)
     delete_status = ShaderProxy(GL.GL_DELETE_STATUS, dtype=np.bool)
     source_length = ShaderProxy(GL.GL_SHADER_SOURCE_LENGTH)
 
     @classmethod
-    def open(cls, filename):
+    def open(cls, filename, **kwargs):
         with open(filename, 'r') as f:
             source = f.read()
-            return cls(source)
+            return cls(source, **kwargs)
 
-    def __init__(self, source):
+    def __init__(self, source, label=None):
         super(Shader, self).__init__()
         self._set_source(source)
         self._compile()
 
+        if label:
+            self.label = label
+
     def _set_source(self, source):
         GL.glShaderSource(self._handle, source)
 
@@ -5,6 +5,7 @@ from OpenGL.raw.GL.VERSION import GL_2_0
 import numpy as np
 from . import enumerations
 from .. import dtypes
+from ..counters import counters
 
 
 class ProgramVariable(object):
@@ -25,7 +26,10 @@ class ProgramVariable(object):
         self._parse_type()
 
     def _format_for_enum(self, enum):
-        if '_UNSIGNED_INT' in self._enum.name:
+        # samplers are always set with glUniform1i, including unsigned integer samplers
+        if 'SAMPLER' in self._enum.name:
+            return 'i'
+        elif '_UNSIGNED_INT' in self._enum.name:
             return 'ui'
         elif '_FLOAT' in self._enum.name:
             return 'f'
@@ -187,6 +191,14 @@ class Uniform(ProgramVariable):
             return self._dimensions[0]
 
     def _set_data(self, location, value):
+        if counters.enabled:
+            counters.add('uniform_uploads')
+
+        # the program re-reads its texture units when a sampler's unit is changed
+        if 'SAMPLER' in self._enum.name:
+            self._program._texture_units = None
+            self._program._texture_handles.pop(self._name, None)
+
         value = np.array(value, dtype=self._dtype)
         count = value.nbytes / self.itemsize
         if self._is_matrix:
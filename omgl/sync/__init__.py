@@ -0,0 +1,4 @@
+from __future__ import absolute_import, print_function
+
+
+from .fence import *
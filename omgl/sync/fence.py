@@ -0,0 +1,182 @@
+from __future__ import absolute_import
+from OpenGL import GL
+from ..object import ManagedObject
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+def _nanoseconds(seconds):
+    return int(seconds * 1e9)
+
+
+class Fence(ManagedObject):
+    """A GPU fence sync object.
+
+    The fence is inserted into the command stream when created, and is
+    signaled once the GPU has completed all commands issued before it.
+
+    Fences can be awaited from an asyncio event loop running on the thread
+    that owns the GL context::
+
+        fence = Fence()
+        await fence
+
+    """
+    _delete_func = GL.glDeleteSync
+
+    def __init__(self):
+        super(Fence, self).__init__()
+
+    def _create(self, handle):
+        self._handle = handle or GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self._flushed = False
+        self._signaled = False
+
+    def insert(self):
+        """Re-inserts the fence into the command stream.
+        """
+        self._destroy()
+        self._create(None)
+
+    def _client_wait(self, timeout):
+        # flush the fence to the GPU the first time we wait on it
+        # otherwise the fence may never be signaled
+        flags = 0 if self._flushed else GL.GL_SYNC_FLUSH_COMMANDS_BIT
+        self._flushed = True
+
+        result = GL.glClientWaitSync(self._handle, flags, timeout)
+        if result == GL.GL_WAIT_FAILED:
+            raise ValueError('Fence wait failed')
+
+        self._signaled = result in (GL.GL_ALREADY_SIGNALED, GL.GL_CONDITION_SATISFIED)
+        return self._signaled
+
+    def poll(self):
+        """Returns True if the fence is signaled, without blocking.
+        """
+        if self._signaled:
+            return True
+        return self._client_wait(0)
+
+    def wait(self, timeout=None):
+        """Blocks until the fence is signaled or the timeout, in seconds, expires.
+
+        Returns True if the fence was signaled.
+        """
+        if self._signaled:
+            return True
+
+        if timeout is None:
+            while not self._client_wait(_nanoseconds(1.)):
+                pass
+            return True
+        return self._client_wait(_nanoseconds(timeout))
+
+    def gpu_wait(self):
+        """Makes the GPU wait for the fence before executing further commands.
+
+        This doesn't block the CPU, and is used to synchronise between contexts.
+        """
+        GL.glWaitSync(self._handle, 0, GL.GL_TIMEOUT_IGNORED)
+
+    def future(self, interval=0.001, loop=None):
+        """Returns an asyncio future that is resolved once the fence is signaled.
+
+        The fence is polled from the event loop every interval seconds
+        without blocking it.
+        The loop must run on the thread that owns the GL context.
+        """
+        if not asyncio:
+            raise ValueError('asyncio not available')
+
+        loop = loop or asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def check():
+            if future.done():
+                return
+            try:
+                if self.poll():
+                    future.set_result(self)
+                else:
+                    loop.call_later(interval, check)
+            except Exception as e:
+                future.set_exception(e)
+
+        check()
+        return future
+
+    def __await__(self):
+        return self.future().__await__()
+
+    @property
+    def signaled(self):
+        return self.poll()
+
+
+class RegionGuard(object):
+    """Guards byte ranges of a buffer with fences.
+
+    Protect a region after issuing commands that use it, and wait on the
+    region before modifying it from the CPU::
+
+        guard = RegionGuard()
+        buffer.set_data(data, offset)
+        mesh.render()
+        guard.protect(offset, data.nbytes)
+
+        # later, before writing to the region again
+        guard.wait(offset, data.nbytes)
+
+    """
+    def __init__(self):
+        self._fences = []
+
+    def _overlapping(self, offset, nbytes):
+        end = offset + nbytes
+        return [
+            region for region in self._fences
+            if region[0] < end and offset < region[1]
+        ]
+
+    def _prune(self):
+        self._fences = [region for region in self._fences if not region[2].poll()]
+
+    def protect(self, offset, nbytes):
+        """Inserts a fence protecting the region.
+        """
+        self._prune()
+        fence = Fence()
+        self._fences.append((offset, offset + nbytes, fence))
+        return fence
+
+    def poll(self, offset, nbytes):
+        """Returns True if the region is no longer in use, without blocking.
+        """
+        self._prune()
+        return not self._overlapping(offset, nbytes)
+
+    def wait(self, offset, nbytes, timeout=None):
+        """Blocks until the region is no longer in use, or the timeout expires.
+
+        Returns True if the region is no longer in use.
+        """
+        for region in self._overlapping(offset, nbytes):
+            if not region[2].wait(timeout):
+                return False
+            self._fences.remove(region)
+        return True
+
+    def future(self, offset, nbytes, interval=0.001, loop=None):
+        """Returns an asyncio future that is resolved once the region is no longer in use.
+        """
+        if not asyncio:
+            raise ValueError('asyncio not available')
+
+        fences = [region[2].future(interval, loop) for region in self._overlapping(offset, nbytes)]
+        return asyncio.gather(*fences)
+
+    def clear(self):
+        self._fences = []
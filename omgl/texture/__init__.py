@@ -2,3 +2,9 @@ from __future__ import absolute_import, print_function
 
 
 from .texture import *
+from .atlas import *
+from .compressed import *
+from .mipmaps import *
+from .sampler import *
+from .units import *
+from .cache import *
@@ -0,0 +1,273 @@
+from __future__ import absolute_import
+import numpy as np
+from OpenGL import GL
+from .texture import Texture2D, TextureArray2D
+
+
+def _align(value, alignment):
+    return (value + alignment - 1) // alignment * alignment
+
+def _next_power_of_two(value):
+    return 1 << (int(value) - 1).bit_length() if value > 1 else 1
+
+
+class SkylinePacker(object):
+    """Packs rectangles into a fixed size area using the skyline bottom-left heuristic.
+
+    The skyline is the top edge of the packed rectangles, stored as
+    a list of [x, y, width] segments.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._skyline = [[0, 0, width]]
+
+    def _fit(self, index, width, height):
+        # the lowest y a rectangle starting at the segment can be placed at
+        x = self._skyline[index][0]
+        if x + width > self.width:
+            return None
+
+        y = 0
+        remaining = width
+        while remaining > 0:
+            segment = self._skyline[index]
+            y = max(y, segment[1])
+            if y + height > self.height:
+                return None
+            remaining -= segment[2]
+            index += 1
+        return y
+
+    def insert(self, width, height):
+        """Returns the (x, y) position of the rectangle, or None if it doesn't fit.
+        """
+        best = None
+        for index in range(len(self._skyline)):
+            y = self._fit(index, width, height)
+            if y is None:
+                continue
+            # lowest, then left most
+            if best is None or y < best[1]:
+                best = (index, y)
+
+        if best is None:
+            return None
+
+        index, y = best
+        x = self._skyline[index][0]
+        self._add_segment(index, x, y + height, width)
+        return x, y
+
+    def _add_segment(self, index, x, y, width):
+        self._skyline.insert(index, [x, y, width])
+
+        # shrink or remove the segments now covered by the new one
+        end = x + width
+        next_index = index + 1
+        while next_index < len(self._skyline):
+            segment = self._skyline[next_index]
+            if segment[0] >= end:
+                break
+            overlap = end - segment[0]
+            if overlap < segment[2]:
+                segment[0] += overlap
+                segment[2] -= overlap
+                break
+            del self._skyline[next_index]
+
+        # merge neighbouring segments of the same height
+        merged = [self._skyline[0]]
+        for segment in self._skyline[1:]:
+            if segment[1] == merged[-1][1]:
+                merged[-1][2] += segment[2]
+            else:
+                merged.append(segment)
+        self._skyline = merged
+
+
+def _expand_channels(rows, channels):
+    # grey scale channels are replicated, a missing alpha channel is opaque
+    count = rows.shape[-1]
+    if count == channels:
+        return rows
+    if count > channels:
+        raise ValueError('Image has more channels than the atlas')
+
+    opaque = 1 if rows.dtype.kind == 'f' else np.iinfo(rows.dtype).max
+    # the last channel of 2 and 4 channel images is alpha
+    colours = channels - 1 if channels in (2, 4) else channels
+    if count <= 2:
+        colour = np.repeat(rows[..., :1], colours, axis=-1)
+        alpha = rows[..., 1:2] if count == 2 else None
+    else:
+        colour = rows[..., :3]
+        alpha = None
+
+    result = np.empty(rows.shape[:2] + (channels,), dtype=rows.dtype)
+    result[..., :colours] = colour[..., :colours]
+    if channels in (2, 4):
+        result[..., -1] = alpha[..., 0] if alpha is not None else opaque
+    return result
+
+
+class TextureAtlas(object):
+    """Packs many images into a single Texture2D, or the layers of a TextureArray2D.
+
+    Images are arrays in the layout used for texture data, such as those
+    returned by decode_image.
+    Each image is surrounded by padding texels that repeat its edges, so
+    filtering doesn't sample neighbouring images.
+    Mipmaps are only generated for mip_levels levels, images are aligned to
+    2 ** mip_levels texels so those levels don't mix neighbouring images.
+
+    The transforms table converts each image's texture coordinates into the
+    atlas, uv * scale + offset, as rows of (offset u, offset v, scale u, scale v),
+    and layers holds each image's array layer::
+
+        atlas = TextureAtlas(images, padding=4, mip_levels=2)
+        uvs = atlas.transform_uvs(uvs, image_indices)
+
+        # or per instance
+        transforms = VertexBuffer(atlas.transforms.view(dtype=[('in_uv_transform', np.float32, 4)]))
+    """
+    def __init__(self, images, padding=2, mip_levels=0, max_size=4096, array=False, channels=None, **properties):
+        if not len(images):
+            raise ValueError('No images to pack')
+
+        alignment = 1 << mip_levels
+        dtype = np.dtype(images[0].dtype)
+        channels = channels or max(image.shape[-1] for image in images)
+
+        # images are stored as rows of texels, the first row is the bottom of the image
+        # the size of each image is its (width, height), from its shape
+        sizes = np.array([image.shape[:2] for image in images], dtype=np.int64)
+        slots = np.array([
+            [_align(width + 2 * padding, alignment), _align(height + 2 * padding, alignment)]
+            for width, height in sizes
+        ], dtype=np.int64)
+
+        # the smallest power of two page that could fit every image
+        # array layers are limited to max_size, additional images use more layers
+        largest = _next_power_of_two(slots.max())
+        if largest > max_size:
+            raise ValueError('Images are larger than the maximum atlas size')
+        area = int((slots[:,0] * slots[:,1]).sum())
+        side = min(max(_next_power_of_two(np.sqrt(area)), largest), max_size)
+
+        # place the tallest images first
+        order = np.lexsort((-slots[:,0], -slots[:,1]))
+        if array:
+            positions = self._pack_layers(slots, order, side)
+        else:
+            positions = None
+            while positions is None:
+                positions = self._pack_page(slots, order, side)
+                if positions is None:
+                    if side * 2 > max_size:
+                        raise ValueError("Images don't fit in a {0}x{0} atlas".format(max_size))
+                    side *= 2
+
+        layer_count = int(positions[:,2].max()) + 1
+        pages = np.zeros((layer_count, side, side, channels), dtype=dtype)
+        for index, image in enumerate(images):
+            width, height = sizes[index]
+            slot_width, slot_height = slots[index]
+            x, y, layer = positions[index]
+            rows = np.asarray(image, dtype=dtype).reshape(height, width, -1)
+            rows = _expand_channels(rows, channels)
+            # fill the whole slot by repeating the image's edges
+            rows = np.pad(rows, (
+                (padding, slot_height - height - padding),
+                (padding, slot_width - width - padding),
+                (0, 0),
+            ), mode='edge')
+            pages[layer, y:y + slot_height, x:x + slot_width] = rows
+
+        self._size = side
+        self._rects = np.empty((len(images), 4), dtype=np.int32)
+        self._rects[:,0] = positions[:,0] + padding
+        self._rects[:,1] = positions[:,1] + padding
+        self._rects[:,2:] = sizes
+        self._layers = positions[:,2].astype(np.int32)
+
+        self._transforms = np.empty((len(images), 4), dtype=np.float32)
+        self._transforms[:,:2] = self._rects[:,:2] / float(side)
+        self._transforms[:,2:] = self._rects[:,2:] / float(side)
+
+        mipmap = mip_levels > 0
+        if mipmap:
+            properties['min_filter'] = properties.get('min_filter', GL.GL_LINEAR_MIPMAP_LINEAR)
+
+        # rows are relabelled as (width, height) to match texture data
+        if array:
+            data = pages.reshape(side, side, layer_count, channels)
+            self._texture = TextureArray2D(data, mipmap=mipmap, **properties)
+        else:
+            data = pages[0].reshape(side, side, channels)
+            self._texture = Texture2D(data, mipmap=mipmap, **properties)
+
+        if mipmap:
+            self._texture.mipmap_max_level = mip_levels
+
+    @classmethod
+    def _pack_page(cls, slots, order, side):
+        packer = SkylinePacker(side, side)
+        positions = np.zeros((len(slots), 3), dtype=np.int64)
+        for index in order:
+            position = packer.insert(*slots[index])
+            if position is None:
+                return None
+            positions[index,:2] = position
+        return positions
+
+    @classmethod
+    def _pack_layers(cls, slots, order, side):
+        packers = []
+        positions = np.zeros((len(slots), 3), dtype=np.int64)
+        for index in order:
+            for layer, packer in enumerate(packers):
+                position = packer.insert(*slots[index])
+                if position is not None:
+                    break
+            else:
+                packer = SkylinePacker(side, side)
+                packers.append(packer)
+                layer = len(packers) - 1
+                position = packer.insert(*slots[index])
+            positions[index] = position + (layer,)
+        return positions
+
+    def transform_uvs(self, uvs, indices):
+        """Converts texture coordinates of images into atlas coordinates.
+
+        Indices is the image of each coordinate, or a single image for all of them.
+        """
+        uvs = np.asarray(uvs, dtype=np.float32)
+        transforms = self._transforms[indices]
+        return uvs * transforms[...,2:] + transforms[...,:2]
+
+    @property
+    def texture(self):
+        return self._texture
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def transforms(self):
+        return self._transforms
+
+    @property
+    def layers(self):
+        return self._layers
+
+    @property
+    def rects(self):
+        """The (x, y, width, height) of each image in texels, excluding padding.
+        """
+        return self._rects
+
+    def __len__(self):
+        return len(self._transforms)
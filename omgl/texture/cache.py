@@ -0,0 +1,126 @@
+from __future__ import absolute_import
+import os
+import json
+import errno
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from .texture import decode_image, decode_levels
+
+
+class TextureCache(object):
+    """Caches decoded images, and optionally their mipmaps, on disk.
+
+    Entries are keyed by a hash of the file's contents and the options used
+    to create them, so changed files and options are decoded again.
+    Each level is stored as an .npy file and loaded with a memory map, so warm
+    starts read the data straight from the page cache into OpenGL::
+
+        cache = TextureCache('~/.cache/textures')
+        texture = Texture2D.open('grass.png', cache=cache)
+        textures = Texture2D.open_many(filenames, cache=cache)
+
+    Entries are written to a temporary file and renamed, so processes can
+    share a cache directory.
+    """
+    # increment when the stored format, or the decoding of images, changes
+    version = 1
+
+    def __init__(self, directory):
+        self.directory = os.path.expanduser(directory)
+        self.hits = 0
+        self.misses = 0
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def key(self, filename, **options):
+        """Returns the key of a file's contents and options.
+        """
+        digest = hashlib.sha1()
+        digest.update(json.dumps([self.version, sorted(options.items())], sort_keys=True).encode('utf-8'))
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _read(self, key):
+        try:
+            with open(self._path(key, '.json'), 'r') as f:
+                metadata = json.load(f)
+            levels = [
+                np.load(self._path(key, '.{}.npy'.format(level)), mmap_mode='r')
+                for level in range(metadata['levels'])
+            ]
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        return levels, metadata['metadata']
+
+    def _write_file(self, path, write):
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                write(f)
+            shutil.move(temporary, path)
+        except:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def _write(self, key, levels, metadata):
+        for level, data in enumerate(levels):
+            self._write_file(self._path(key, '.{}.npy'.format(level)), lambda f: np.save(f, np.ascontiguousarray(data)))
+
+        # the metadata is written last, an entry without it is incomplete
+        content = json.dumps({'levels': len(levels), 'metadata': metadata})
+        self._write_file(self._path(key, '.json'), lambda f: f.write(content.encode('utf-8')))
+
+    def get(self, filename, create, **options):
+        """Returns the (levels, metadata) cached for the file and options.
+
+        On a miss, create(filename) is called to produce a list of arrays, level 0 first,
+        and a dict of JSON serialisable metadata, which are stored.
+        """
+        key = self.key(filename, **options)
+        cached = self._read(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        levels, metadata = create(filename)
+        self._write(key, levels, metadata)
+        return self._read(key) or (levels, metadata)
+
+    def load_image(self, filename, flip=True):
+        """Returns the decoded image and swizzle, as decode_image does.
+        """
+        def create(filename):
+            data, swizzle = decode_image(filename, flip=flip)
+            return [data], {'swizzle': swizzle}
+
+        levels, metadata = self.get(filename, create, flip=flip)
+        return levels[0], metadata.get('swizzle')
+
+    def load_levels(self, filename, flip=True, **options):
+        """Returns the image's mipmap levels and swizzle, as decode_levels does.
+        """
+        def create(filename):
+            levels, swizzle = decode_levels(filename, flip=flip, **options)
+            return levels, {'swizzle': swizzle}
+
+        levels, metadata = self.get(filename, create, flip=flip, mipmap=options)
+        return levels, metadata.get('swizzle')
+
+    def clear(self):
+        """Removes all entries.
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') or name.endswith('.json') or name.endswith('.tmp'):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,413 @@
+from __future__ import absolute_import
+import ctypes
+import struct
+from collections import namedtuple
+import numpy as np
+from OpenGL import GL
+from OpenGL.GL.EXT import texture_compression_s3tc as s3tc
+from OpenGL.GL.EXT import texture_sRGB as srgb
+from OpenGL.raw.GL.VERSION import GL_1_3 as raw_gl
+from .. import features
+from ..counters import counters
+from .texture import Texture, Texture2D
+
+
+# all supported formats use 4x4 blocks
+CompressedFormat = namedtuple('CompressedFormat', ['name', 'block_nbytes', 'format', 'channels', 'dtype'])
+
+compressed_formats = {
+    # BC1 - BC3 / S3TC
+    s3tc.GL_COMPRESSED_RGB_S3TC_DXT1_EXT:           CompressedFormat('BC1', 8, GL.GL_RGB, 3, np.uint8),
+    s3tc.GL_COMPRESSED_RGBA_S3TC_DXT1_EXT:          CompressedFormat('BC1', 8, GL.GL_RGBA, 4, np.uint8),
+    s3tc.GL_COMPRESSED_RGBA_S3TC_DXT3_EXT:          CompressedFormat('BC2', 16, GL.GL_RGBA, 4, np.uint8),
+    s3tc.GL_COMPRESSED_RGBA_S3TC_DXT5_EXT:          CompressedFormat('BC3', 16, GL.GL_RGBA, 4, np.uint8),
+    srgb.GL_COMPRESSED_SRGB_S3TC_DXT1_EXT:          CompressedFormat('BC1', 8, GL.GL_RGB, 3, np.uint8),
+    srgb.GL_COMPRESSED_SRGB_ALPHA_S3TC_DXT1_EXT:    CompressedFormat('BC1', 8, GL.GL_RGBA, 4, np.uint8),
+    srgb.GL_COMPRESSED_SRGB_ALPHA_S3TC_DXT3_EXT:    CompressedFormat('BC2', 16, GL.GL_RGBA, 4, np.uint8),
+    srgb.GL_COMPRESSED_SRGB_ALPHA_S3TC_DXT5_EXT:    CompressedFormat('BC3', 16, GL.GL_RGBA, 4, np.uint8),
+    # BC4 and BC5 / RGTC, GL 3.0
+    GL.GL_COMPRESSED_RED_RGTC1:                     CompressedFormat('BC4', 8, GL.GL_RED, 1, np.uint8),
+    GL.GL_COMPRESSED_SIGNED_RED_RGTC1:              CompressedFormat('BC4', 8, GL.GL_RED, 1, np.int8),
+    GL.GL_COMPRESSED_RG_RGTC2:                      CompressedFormat('BC5', 16, GL.GL_RG, 2, np.uint8),
+    GL.GL_COMPRESSED_SIGNED_RG_RGTC2:               CompressedFormat('BC5', 16, GL.GL_RG, 2, np.int8),
+    # BC6H and BC7 / BPTC, GL 4.2
+    GL.GL_COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT:       CompressedFormat('BC6H', 16, GL.GL_RGB, 3, np.float32),
+    GL.GL_COMPRESSED_RGB_BPTC_SIGNED_FLOAT:         CompressedFormat('BC6H', 16, GL.GL_RGB, 3, np.float32),
+    GL.GL_COMPRESSED_RGBA_BPTC_UNORM:               CompressedFormat('BC7', 16, GL.GL_RGBA, 4, np.uint8),
+    GL.GL_COMPRESSED_SRGB_ALPHA_BPTC_UNORM:         CompressedFormat('BC7', 16, GL.GL_RGBA, 4, np.uint8),
+    # ETC2 / EAC, GL 4.3
+    GL.GL_COMPRESSED_RGB8_ETC2:                     CompressedFormat('ETC2', 8, GL.GL_RGB, 3, np.uint8),
+    GL.GL_COMPRESSED_SRGB8_ETC2:                    CompressedFormat('ETC2', 8, GL.GL_RGB, 3, np.uint8),
+    GL.GL_COMPRESSED_RGBA8_ETC2_EAC:                CompressedFormat('ETC2', 16, GL.GL_RGBA, 4, np.uint8),
+    GL.GL_COMPRESSED_SRGB8_ALPHA8_ETC2_EAC:         CompressedFormat('ETC2', 16, GL.GL_RGBA, 4, np.uint8),
+    GL.GL_COMPRESSED_R11_EAC:                       CompressedFormat('EAC', 8, GL.GL_RED, 1, np.uint8),
+    GL.GL_COMPRESSED_RG11_EAC:                      CompressedFormat('EAC', 16, GL.GL_RG, 2, np.uint8),
+}
+
+
+def supported_compressed_formats():
+    """Returns the compressed internal formats reported by the driver.
+
+    Drivers aren't required to report formats such as RGTC, which are supported by GL 3.0.
+    """
+    count = int(GL.glGetIntegerv(GL.GL_NUM_COMPRESSED_TEXTURE_FORMATS))
+    if not count:
+        return set()
+    return set(int(value) for value in np.atleast_1d(GL.glGetIntegerv(GL.GL_COMPRESSED_TEXTURE_FORMATS)))
+
+def compressed_nbytes(internal_format, size):
+    """Returns the number of bytes of an image of (width, height) in a compressed format.
+    """
+    block_nbytes = compressed_formats[internal_format].block_nbytes
+    return ((size[0] + 3) // 4) * ((size[1] + 3) // 4) * block_nbytes
+
+
+class CompressedTexture2D(Texture2D):
+    """A 2D texture stored in a block compressed format, such as BC1 - BC7.
+
+    Levels is a list of the compressed data of each mipmap level, starting with
+    level 0, the data is uploaded as is.
+    Mipmaps can't be generated for compressed textures, so mipmaps must be provided::
+
+        levels = [encode_bc1(level) for level in mipmaps]
+        texture = CompressedTexture2D(levels, s3tc.GL_COMPRESSED_RGB_S3TC_DXT1_EXT, size=(256, 256))
+
+        texture = CompressedTexture2D.open('grass.dds')
+
+    Reading the texture with get_data returns decompressed data.
+    """
+    def __init__(self, levels, internal_format, size, label=None, **properties):
+        super(Texture, self).__init__()
+
+        if internal_format not in compressed_formats:
+            raise ValueError('Unknown compressed format {}'.format(internal_format))
+        compressed_format = compressed_formats[internal_format]
+
+        self._internal_format = internal_format
+        self._format = compressed_format.format
+        self._size = tuple(size)
+        self._shape = self._size + (compressed_format.channels,)
+        self._dtype = np.dtype(compressed_format.dtype)
+        self._levels = len(levels)
+
+        default_filter = GL.GL_LINEAR_MIPMAP_LINEAR if self._levels > 1 else GL.GL_LINEAR
+        properties['min_filter'] = properties.get('min_filter', default_filter)
+        properties['mag_filter'] = properties.get('mag_filter', GL.GL_LINEAR)
+        for k,v in properties.items():
+            if v:
+                setattr(self, k, v)
+
+        if self._immutable:
+            self._allocate_storage()
+            for level, data in enumerate(levels):
+                self.set_compressed_data(data, level=level)
+        else:
+            border = 0
+            with self:
+                for level, data in enumerate(levels):
+                    data = np.ascontiguousarray(data, dtype=np.uint8)
+                    width, height = self.level_size(level)
+                    # PyOpenGL passes the size of the data
+                    GL.glCompressedTexImage2D(self._target, level, internal_format, width, height, border, data)
+                    if counters.enabled:
+                        counters.add('bytes_uploaded', data.nbytes, label=self.__class__.__name__)
+
+        self.mipmap_max_level = self._levels - 1
+
+        if label:
+            self.label = label
+
+    @classmethod
+    def open(cls, filename, **kwargs):
+        """Opens a DDS or KTX file, uploading all of its mipmap levels.
+        """
+        with open(filename, 'rb') as f:
+            magic = f.read(len(_ktx_identifier))
+
+        if magic.startswith(b'DDS '):
+            levels, internal_format, size = load_dds(filename)
+        elif magic == _ktx_identifier:
+            levels, internal_format, size = load_ktx(filename)
+        else:
+            raise ValueError('Unknown compressed texture file {}'.format(filename))
+        return cls(levels, internal_format, size, **kwargs)
+
+    def set_compressed_data(self, data, level=0, offset=None, size=None):
+        """Updates a region of a level with compressed data.
+
+        Offset and size must be multiples of the 4x4 block size, except at the edges of the level.
+        """
+        data = np.ascontiguousarray(data, dtype=np.uint8)
+        offset = offset or [0, 0]
+        size = size or self.level_size(level)
+
+        if features.direct_state_access:
+            # GL 4.5
+            GL.glCompressedTextureSubImage2D(self._handle, level, offset[0], offset[1], size[0], size[1], self._internal_format, data.nbytes, data)
+        else:
+            with self:
+                # PyOpenGL passes the size of the data
+                GL.glCompressedTexSubImage2D(self._target, level, offset[0], offset[1], size[0], size[1], self._internal_format, data)
+
+        if counters.enabled:
+            counters.add('bytes_uploaded', data.nbytes, label=self.__class__.__name__)
+
+    def get_compressed_data(self, level=0):
+        """Returns the compressed data of a level.
+        """
+        data = np.empty(compressed_nbytes(self._internal_format, self.level_size(level)), dtype=np.uint8)
+        if features.direct_state_access:
+            # GL 4.5
+            GL.glGetCompressedTextureImage(self._handle, level, data.nbytes, data)
+        else:
+            with self:
+                raw_gl.glGetCompressedTexImage(self._target, level, ctypes.c_void_p(data.ctypes.data))
+
+        if counters.enabled:
+            counters.add('bytes_read', data.nbytes, label=self.__class__.__name__)
+        return data
+
+    def mipmap(self):
+        raise ValueError("Mipmaps can't be generated for compressed textures")
+
+    @property
+    def compressed_format(self):
+        return compressed_formats[self._internal_format]
+
+
+# DDS files, https://docs.microsoft.com/en-us/windows/win32/direct3ddds/dx-graphics-dds-pguide
+# magic, header, pixel format and caps
+_dds_header = struct.Struct('<4s7I44xII4s5I5I')
+_dds_dx10_header = struct.Struct('<5I')
+
+_dds_four_cc = {
+    b'DXT1': s3tc.GL_COMPRESSED_RGBA_S3TC_DXT1_EXT,
+    b'DXT3': s3tc.GL_COMPRESSED_RGBA_S3TC_DXT3_EXT,
+    b'DXT5': s3tc.GL_COMPRESSED_RGBA_S3TC_DXT5_EXT,
+    b'ATI1': GL.GL_COMPRESSED_RED_RGTC1,
+    b'BC4U': GL.GL_COMPRESSED_RED_RGTC1,
+    b'BC4S': GL.GL_COMPRESSED_SIGNED_RED_RGTC1,
+    b'ATI2': GL.GL_COMPRESSED_RG_RGTC2,
+    b'BC5U': GL.GL_COMPRESSED_RG_RGTC2,
+    b'BC5S': GL.GL_COMPRESSED_SIGNED_RG_RGTC2,
+}
+
+_dxgi_formats = {
+    71: s3tc.GL_COMPRESSED_RGBA_S3TC_DXT1_EXT,
+    72: srgb.GL_COMPRESSED_SRGB_ALPHA_S3TC_DXT1_EXT,
+    74: s3tc.GL_COMPRESSED_RGBA_S3TC_DXT3_EXT,
+    75: srgb.GL_COMPRESSED_SRGB_ALPHA_S3TC_DXT3_EXT,
+    77: s3tc.GL_COMPRESSED_RGBA_S3TC_DXT5_EXT,
+    78: srgb.GL_COMPRESSED_SRGB_ALPHA_S3TC_DXT5_EXT,
+    80: GL.GL_COMPRESSED_RED_RGTC1,
+    81: GL.GL_COMPRESSED_SIGNED_RED_RGTC1,
+    83: GL.GL_COMPRESSED_RG_RGTC2,
+    84: GL.GL_COMPRESSED_SIGNED_RG_RGTC2,
+    95: GL.GL_COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT,
+    96: GL.GL_COMPRESSED_RGB_BPTC_SIGNED_FLOAT,
+    98: GL.GL_COMPRESSED_RGBA_BPTC_UNORM,
+    99: GL.GL_COMPRESSED_SRGB_ALPHA_BPTC_UNORM,
+}
+
+def _split_levels(data, offset, internal_format, size, count):
+    levels = []
+    for level in range(count):
+        level_size = [max(1, s >> level) for s in size]
+        nbytes = compressed_nbytes(internal_format, level_size)
+        if offset + nbytes > len(data):
+            raise ValueError('Compressed data is truncated')
+        levels.append(data[offset:offset + nbytes])
+        offset += nbytes
+    return levels
+
+def load_dds(filename):
+    """Loads a compressed 2D DDS file.
+
+    Returns a list of the data of each mipmap level, the internal format and the size.
+    DDS images are stored top row first, so texture coordinates are flipped vertically.
+    """
+    data = np.fromfile(filename, dtype=np.uint8)
+    if len(data) < _dds_header.size:
+        raise ValueError('Invalid DDS file')
+
+    header = _dds_header.unpack(data[:_dds_header.size].tostring())
+    magic, _, _, height, width, _, _, mipmap_count = header[:8]
+    four_cc = header[10]
+    if magic != b'DDS ':
+        raise ValueError('Invalid DDS file')
+
+    offset = _dds_header.size
+    if four_cc == b'DX10':
+        dxgi_format = _dds_dx10_header.unpack(data[offset:offset + _dds_dx10_header.size].tostring())[0]
+        offset += _dds_dx10_header.size
+        internal_format = _dxgi_formats.get(dxgi_format)
+    else:
+        internal_format = _dds_four_cc.get(four_cc)
+
+    if internal_format is None:
+        raise ValueError('Unsupported DDS format')
+
+    size = (width, height)
+    levels = _split_levels(data, offset, internal_format, size, max(1, mipmap_count))
+    return levels, internal_format, size
+
+
+# KTX 1 files, https://www.khronos.org/registry/KTX/specs/1.0/ktxspec_v1.html
+_ktx_identifier = b'\xabKTX 11\xbb\r\n\x1a\n'
+_ktx_header = struct.Struct('<13I')
+_ktx_endianness = 0x04030201
+
+def load_ktx(filename):
+    """Loads a compressed 2D KTX file.
+
+    Returns a list of the data of each mipmap level, the internal format and the size.
+    """
+    data = np.fromfile(filename, dtype=np.uint8)
+    offset = len(_ktx_identifier)
+    if data[:offset].tostring() != _ktx_identifier:
+        raise ValueError('Invalid KTX file')
+
+    header = _ktx_header.unpack(data[offset:offset + _ktx_header.size].tostring())
+    (
+        endianness, gl_type, _, _, internal_format, _,
+        width, height, depth, array_elements, faces, mipmap_count, key_value_nbytes,
+    ) = header
+    offset += _ktx_header.size + key_value_nbytes
+
+    if endianness != _ktx_endianness:
+        raise ValueError('Big endian KTX files are not supported')
+    if gl_type != 0 or internal_format not in compressed_formats:
+        raise ValueError('Only compressed KTX files are supported')
+    if depth or array_elements or faces != 1:
+        raise ValueError('Only 2D KTX files are supported')
+
+    levels = []
+    for level in range(max(1, mipmap_count)):
+        nbytes = int(data[offset:offset + 4].view('<u4')[0])
+        offset += 4
+        if offset + nbytes > len(data):
+            raise ValueError('Compressed data is truncated')
+        levels.append(data[offset:offset + nbytes])
+        # levels are padded to 4 bytes
+        offset += (nbytes + 3) // 4 * 4
+    return levels, internal_format, (width, height)
+
+def save_ktx(filename, levels, internal_format, size):
+    """Saves compressed mipmap levels as a 2D KTX file.
+    """
+    if internal_format not in compressed_formats:
+        raise ValueError('Unknown compressed format {}'.format(internal_format))
+
+    base_format = compressed_formats[internal_format].format
+    with open(filename, 'wb') as f:
+        f.write(_ktx_identifier)
+        f.write(_ktx_header.pack(
+            _ktx_endianness, 0, 1, 0, internal_format, base_format,
+            size[0], size[1], 0, 0, 1, len(levels), 0,
+        ))
+        for data in levels:
+            data = np.ascontiguousarray(data, dtype=np.uint8)
+            f.write(struct.pack('<I', data.nbytes))
+            f.write(data.tostring())
+            f.write(b'\0' * ((4 - data.nbytes % 4) % 4))
+
+
+def _blocks(data):
+    # split an image in the layout of texture data into 4x4 blocks of texels
+    # blocks are ordered row by row, as are the texels within them
+    data = np.asarray(data)
+    width, height = data.shape[:2]
+    rows = data.reshape(height, width, -1)
+    rows = np.pad(rows, ((0, -height % 4), (0, -width % 4), (0, 0)), mode='edge')
+    block_rows, block_columns = rows.shape[0] // 4, rows.shape[1] // 4
+    blocks = rows.reshape(block_rows, 4, block_columns, 4, -1).transpose(0, 2, 1, 3, 4)
+    return blocks.reshape(block_rows * block_columns, 16, -1)
+
+def _to_565(colours):
+    colours = np.clip(np.rint(colours), 0, 255).astype(np.uint16)
+    return (colours[:,0] >> 3) << 11 | (colours[:,1] >> 2) << 5 | colours[:,2] >> 3
+
+def _from_565(values):
+    red = (values >> 11) & 31
+    green = (values >> 5) & 63
+    blue = values & 31
+    colours = np.stack([red << 3 | red >> 2, green << 2 | green >> 4, blue << 3 | blue >> 2], axis=-1)
+    return colours.astype(np.float32)
+
+def encode_bc1(data):
+    """Encodes uint8 RGB or RGBA data, in the layout of texture data, as BC1 blocks.
+
+    Endpoints are fitted to the principal axis of each block's colours, alpha is ignored.
+    The result is used with GL_COMPRESSED_RGB_S3TC_DXT1_EXT.
+    """
+    blocks = _blocks(data).astype(np.float32)
+    if blocks.shape[-1] < 3:
+        blocks = np.repeat(blocks[..., :1], 3, axis=-1)
+    blocks = blocks[..., :3]
+
+    # the principal axis of each block, by power iteration
+    mean = blocks.mean(axis=1)
+    centred = blocks - mean[:,None]
+    covariance = np.einsum('nki,nkj->nij', centred, centred)
+    # start from the covariance of the channel that varies most, the min / max
+    # range is orthogonal to the axis when channels are anti-correlated
+    variance = np.einsum('nii->ni', covariance)
+    axis = covariance[np.arange(len(blocks)), variance.argmax(axis=1)]
+    # blocks of a single colour have no covariance, so use the min / max range
+    flat = np.linalg.norm(axis, axis=-1) < 1e-6
+    axis[flat] = (blocks.max(axis=1) - blocks.min(axis=1) + 1e-3)[flat]
+    for _ in range(8):
+        product = np.einsum('nij,nj->ni', covariance, axis)
+        norm = np.linalg.norm(product, axis=-1)[:,None]
+        axis = np.where(norm > 1e-6, product / np.maximum(norm, 1e-6), axis)
+
+    projection = np.einsum('nki,ni->nk', centred, axis)
+    # inset the endpoints slightly, as the extremes are rarely worth an exact match
+    extent = projection.max(axis=1) - projection.min(axis=1)
+    high = mean + axis * (projection.max(axis=1) - extent / 16.)[:,None]
+    low = mean + axis * (projection.min(axis=1) + extent / 16.)[:,None]
+
+    # four colour mode requires the first endpoint to be larger
+    colour0, colour1 = _to_565(high), _to_565(low)
+    swap = colour0 < colour1
+    colour0, colour1 = np.where(swap, colour1, colour0), np.where(swap, colour0, colour1)
+
+    endpoint0, endpoint1 = _from_565(colour0), _from_565(colour1)
+    palette = np.stack([
+        endpoint0,
+        endpoint1,
+        (2. * endpoint0 + endpoint1) / 3.,
+        (endpoint0 + 2. * endpoint1) / 3.,
+    ], axis=1)
+    distances = ((blocks[:,:,None,:] - palette[:,None,:,:]) ** 2).sum(axis=-1)
+    indices = distances.argmin(axis=-1).astype(np.uint32)
+    indices[colour0 == colour1] = 0
+
+    result = np.empty(len(blocks), dtype=[('colour0', '<u2'), ('colour1', '<u2'), ('indices', '<u4')])
+    result['colour0'] = colour0
+    result['colour1'] = colour1
+    result['indices'] = (indices << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+    return result.view(np.uint8)
+
+# the weight of the first endpoint of each BC4 index, in eight value mode
+_bc4_weights = np.array([7, 0, 6, 5, 4, 3, 2, 1], dtype=np.float32) / 7.
+
+def encode_bc4(data):
+    """Encodes the first channel of uint8 data, in the layout of texture data, as BC4 blocks.
+
+    The result is used with GL_COMPRESSED_RED_RGTC1.
+    """
+    values = _blocks(data)[..., 0].astype(np.float32)
+
+    red0 = values.max(axis=1)
+    red1 = values.min(axis=1)
+    palette = red1[:,None] + (red0 - red1)[:,None] * _bc4_weights
+    indices = np.abs(values[:,:,None] - palette[:,None,:]).argmin(axis=-1).astype(np.uint64)
+    bits = (indices << (3 * np.arange(16, dtype=np.uint64))).sum(axis=1, dtype=np.uint64)
+
+    result = np.empty((len(values), 8), dtype=np.uint8)
+    result[:,0] = red0
+    result[:,1] = red1
+    # 48 bits of indices, little endian
+    result[:,2:] = bits.astype('<u8').view(np.uint8).reshape(-1, 8)[:,:6]
+    return result.reshape(-1)
@@ -0,0 +1,166 @@
+from __future__ import absolute_import
+import numpy as np
+
+
+def _box_weights(indices, centres, scale):
+    # the overlap of each source texel with the destination texel's footprint
+    # this handles odd sizes, where destination texels cover 3 source texels
+    low = centres - scale * 0.5
+    high = centres + scale * 0.5
+    return np.clip(np.minimum(indices + 1, high) - np.maximum(indices, low), 0., None)
+
+def _kaiser_weights(indices, centres, scale, width=3., alpha=4.):
+    # a Kaiser windowed sinc, measured in destination texels
+    x = (indices + 0.5 - centres) / scale
+    window = np.i0(alpha * np.sqrt(np.clip(1. - (x / width) ** 2, 0., None))) / np.i0(alpha)
+    return np.where(np.abs(x) < width, np.sinc(x) * window, 0.)
+
+# filter function and radius in destination texels
+mipmap_filters = {
+    'box':      (_box_weights, 0.5),
+    'kaiser':   (_kaiser_weights, 3.),
+}
+
+
+def _resample_axis(data, axis, size, filter):
+    # each destination texel is a weighted sum of a fixed number of source texels
+    weights_function, radius = mipmap_filters[filter]
+    scale = data.shape[axis] / float(size)
+    centres = (np.arange(size) + 0.5)[:, None] * scale
+    taps = int(np.ceil(2 * radius * scale)) + 1
+    indices = np.floor(centres - radius * scale).astype(np.int64) + np.arange(taps)
+    weights = weights_function(indices.astype(np.float64), centres, scale)
+    weights /= weights.sum(axis=1, keepdims=True)
+
+    # texels beyond the edges repeat the edge
+    indices = np.clip(indices, 0, data.shape[axis] - 1)
+
+    shape = [1] * data.ndim
+    shape[axis] = size
+    result = np.zeros(data.shape[:axis] + (size,) + data.shape[axis + 1:], dtype=np.float32)
+    for tap in range(taps):
+        weight = weights[:, tap]
+        if weight.any():
+            result += weight.astype(np.float32).reshape(shape) * np.take(data, indices[:, tap], axis=axis)
+    return result
+
+
+def _srgb_to_linear(values):
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+def _linear_to_srgb(values):
+    values = np.clip(values, 0., 1.)
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * values ** (1. / 2.4) - 0.055)
+
+def _colour_channels(channels):
+    # the last channel of 2 and 4 channel images is alpha
+    return channels - 1 if channels in (2, 4) else channels
+
+
+def _to_float(data, srgb, normal_map):
+    dtype = np.dtype(data.dtype)
+    values = data.astype(np.float32)
+    if dtype.kind == 'u':
+        values /= np.iinfo(dtype).max
+    elif dtype.kind == 'i':
+        values = np.maximum(values / np.iinfo(dtype).max, -1.)
+
+    colour = _colour_channels(values.shape[-1])
+    if srgb:
+        values[..., :colour] = _srgb_to_linear(values[..., :colour])
+    if normal_map and dtype.kind == 'u':
+        values[..., :3] = values[..., :3] * 2. - 1.
+    return values
+
+def _from_float(values, dtype, srgb, normal_map):
+    dtype = np.dtype(dtype)
+    values = values.copy()
+    colour = _colour_channels(values.shape[-1])
+    if normal_map and dtype.kind == 'u':
+        values[..., :3] = values[..., :3] * 0.5 + 0.5
+    if srgb:
+        values[..., :colour] = _linear_to_srgb(values[..., :colour])
+
+    if dtype.kind == 'f':
+        return values.astype(dtype)
+    info = np.iinfo(dtype)
+    low = 0. if dtype.kind == 'u' else -1.
+    return np.round(np.clip(values, low, 1.) * info.max).astype(dtype)
+
+
+def _normalise(values):
+    length = np.sqrt((values[..., :3] ** 2).sum(axis=-1))[..., None]
+    values[..., :3] /= np.maximum(length, 1e-8)
+    return values
+
+def _scale_alpha(alpha, threshold, coverage):
+    # scale alpha so the same fraction of texels pass the alpha test as level 0
+    # https://www.ludicon.com/castano/blog/computing-alpha-mipmaps/
+    if coverage <= 0.:
+        return alpha
+    cutoff = np.percentile(alpha, 100. * (1. - coverage))
+    if cutoff <= 0.:
+        return alpha
+    return np.clip(alpha * (threshold / cutoff), 0., 1.)
+
+
+def mipmap_count(size, dimensions=None):
+    """Returns the number of mipmap levels of size, down to 1 texel.
+    """
+    size = size[:dimensions]
+    if not size:
+        return 1
+    return int(max(size)).bit_length()
+
+def generate_mipmaps(data, levels=None, filter='box', srgb=False, normal_map=False, alpha_coverage=None, dimensions=None):
+    """Generates a mipmap chain on the CPU, returning a list of arrays, level 0 first.
+
+    Data is in the layout used for texture data, the size followed by channels.
+    Only the first dimensions of the size are reduced, such as 2 for a TextureArray2D,
+    by default all of them are.
+
+    Filter is 'box' or 'kaiser', a sharper filter which is slower.
+    sRGB data is filtered in linear space.
+    Normal maps, with xyz in the first 3 channels, are re-normalised at each level.
+    If alpha_coverage is an alpha test threshold, alpha is scaled so the same
+    fraction of each level passes the test, which keeps foliage from thinning out.
+
+    Levels are generated without OpenGL, so this can be used by decoding workers
+    and the results cached::
+
+        levels = generate_mipmaps(data, filter='kaiser', srgb=True)
+        texture = Texture2D.from_levels(levels, internal_format=GL.GL_SRGB8_ALPHA8)
+    """
+    if filter not in mipmap_filters:
+        raise ValueError('Unknown mipmap filter {}'.format(filter))
+
+    size = list(data.shape[:-1])
+    channels = data.shape[-1]
+    dimensions = len(size) if dimensions is None else dimensions
+    levels = levels or mipmap_count(size, dimensions)
+    has_alpha = channels in (2, 4) and not normal_map
+
+    # texture data is stored with the first dimension varying fastest
+    # so the size is reversed to index the array in memory order
+    values = _to_float(data, srgb, normal_map).reshape(size[::-1] + [channels])
+    if alpha_coverage is not None and has_alpha:
+        coverage = float((values[..., -1] > alpha_coverage).mean())
+
+    result = [data]
+    for level in range(1, levels):
+        level_size = [max(1, s >> level) if index < dimensions else s for index, s in enumerate(size)]
+        for index in range(dimensions):
+            axis = len(size) - 1 - index
+            if values.shape[axis] != level_size[index]:
+                values = _resample_axis(values, axis, level_size[index], filter)
+
+        if normal_map:
+            values = _normalise(values)
+
+        output = values
+        if alpha_coverage is not None and has_alpha:
+            output = values.copy()
+            output[..., -1] = _scale_alpha(values[..., -1], alpha_coverage, coverage)
+
+        result.append(_from_float(output, data.dtype, srgb, normal_map).reshape(level_size + [channels]))
+    return result
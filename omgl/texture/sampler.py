@@ -0,0 +1,174 @@
+from __future__ import absolute_import
+import weakref
+import numpy as np
+from OpenGL import GL
+from OpenGL.GL.ARB import bindless_texture
+from .. import features
+from ..counters import counters
+from ..context import PerContext
+from ..proxy import Proxy, Integer32Proxy
+from ..object import ManagedObject, DescriptorMixin
+from .units import texture_units
+
+
+class SamplerProxy(Proxy):
+    """Sampler parameter proxy.
+
+    Sampler parameters are set by handle, so the sampler is never bound.
+    """
+    def __init__(self, property, dtype=np.int32, count=1):
+        super(SamplerProxy, self).__init__(dtype=dtype)
+        self._property = property
+        self._count = count
+
+    def __get__(self, obj, cls):
+        # PyOpenGL doesn't wrap the sampler functions, so provide the output array
+        value = np.empty(self._count, dtype=self._dtype)
+        getter = GL.glGetSamplerParameterfv if self._dtype == np.float32 else GL.glGetSamplerParameteriv
+        getter(obj.handle, self._property, value)
+        return self._get_result(value)
+
+    def __set__(self, obj, value):
+        value = np.array(value, dtype=self._dtype).reshape(-1)
+        setter = GL.glSamplerParameterfv if self._dtype == np.float32 else GL.glSamplerParameteriv
+        setter(obj.handle, self._property, value)
+
+class Integer32SamplerProxy(SamplerProxy):
+    def __init__(self, property):
+        super(Integer32SamplerProxy, self).__init__(property, dtype=np.int32)
+
+class Float32SamplerProxy(SamplerProxy):
+    def __init__(self, property, count=1):
+        super(Float32SamplerProxy, self).__init__(property, dtype=np.float32, count=count)
+
+
+class Sampler(DescriptorMixin, ManagedObject):
+    """Filtering and wrapping state, which overrides the parameters of any texture
+    bound to the same unit (GL 3.3).
+
+    Textures with the same parameters can share a sampler, so the parameters are
+    set once, instead of for every texture::
+
+        sampler = Sampler(min_filter=GL.GL_LINEAR_MIPMAP_LINEAR, wrap_s=GL.GL_REPEAT, wrap_t=GL.GL_REPEAT)
+        sampler.bind(0)
+
+    Use sampler_cache to share samplers with identical parameters.
+    """
+    _create_func = GL.glGenSamplers
+    _dsa_create_func = GL.glCreateSamplers
+    _delete_func = GL.glDeleteSamplers
+    _label_identifier = GL.GL_SAMPLER
+
+    max_anisotropy_limit = Integer32Proxy(GL.GL_MAX_TEXTURE_MAX_ANISOTROPY)
+
+    min_filter = Integer32SamplerProxy(GL.GL_TEXTURE_MIN_FILTER)
+    mag_filter = Integer32SamplerProxy(GL.GL_TEXTURE_MAG_FILTER)
+
+    wrap_s = Integer32SamplerProxy(GL.GL_TEXTURE_WRAP_S)
+    wrap_t = Integer32SamplerProxy(GL.GL_TEXTURE_WRAP_T)
+    wrap_r = Integer32SamplerProxy(GL.GL_TEXTURE_WRAP_R)
+
+    lod_bias = Float32SamplerProxy(GL.GL_TEXTURE_LOD_BIAS)
+    min_lod = Float32SamplerProxy(GL.GL_TEXTURE_MIN_LOD)
+    max_lod = Float32SamplerProxy(GL.GL_TEXTURE_MAX_LOD)
+
+    # GL 4.6 / EXT_texture_filter_anisotropic
+    max_anisotropy = Float32SamplerProxy(GL.GL_TEXTURE_MAX_ANISOTROPY)
+
+    border_color = Float32SamplerProxy(GL.GL_TEXTURE_BORDER_COLOR, count=4)
+
+    compare_mode = Integer32SamplerProxy(GL.GL_TEXTURE_COMPARE_MODE)
+    compare_func = Integer32SamplerProxy(GL.GL_TEXTURE_COMPARE_FUNC)
+
+    def __init__(self, label=None, **parameters):
+        # the bindless handles of textures combined with the sampler
+        self._bindless_handles = set()
+        super(Sampler, self).__init__()
+        self._parameters = parameters
+        for name, value in parameters.items():
+            setattr(self, name, value)
+
+        if label:
+            self.label = label
+
+    def _create(self, handle):
+        if handle or features.direct_state_access:
+            return super(Sampler, self)._create(handle)
+
+        # PyOpenGL doesn't wrap glGenSamplers, so provide the output array
+        handles = np.zeros(1, dtype=np.uint32)
+        GL.glGenSamplers(1, handles)
+        self._handle = handles[0]
+
+        if counters.enabled:
+            counters.add('created', label=self.__class__.__name__)
+
+    def _destroy(self):
+        try:
+            # deleted samplers are unbound from every unit
+            texture_units.invalidate()
+            # handles using the sampler must be made non-resident before it's deleted
+            for handle in self._bindless_handles:
+                bindless_texture.glMakeTextureHandleNonResidentARB(handle)
+            self._bindless_handles.clear()
+            GL.glDeleteSamplers(1, np.array([self._handle], dtype=np.uint32))
+            self._handle = None
+
+            if counters.enabled:
+                counters.add('deleted', label=self.__class__.__name__)
+        except:
+            pass
+
+    def bind(self, unit):
+        if counters.enabled:
+            counters.add('binds', label=self.__class__.__name__)
+        texture_units.invalidate()
+        GL.glBindSampler(unit, self._handle)
+
+    def unbind(self, unit):
+        texture_units.invalidate()
+        GL.glBindSampler(unit, 0)
+
+    @property
+    def parameters(self):
+        """The parameters the sampler was created with.
+        """
+        return dict(self._parameters)
+
+
+class SamplerCache(object):
+    """Shares samplers between identical parameter sets.
+
+    Samplers are held weakly and are deleted once nothing references them.
+
+    Samplers returned by the cache are shared and must not be modified.
+    """
+    def __init__(self):
+        self._samplers = weakref.WeakValueDictionary()
+
+    @classmethod
+    def parameters_key(cls, parameters):
+        return tuple(sorted(
+            (name, tuple(np.ravel(value).tolist()) if np.ndim(value) else value)
+            for name, value in parameters.items()
+        ))
+
+    def get(self, **parameters):
+        """Returns a sampler with the parameters, such as min_filter and wrap_s.
+        """
+        key = self.parameters_key(parameters)
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            sampler = Sampler(**parameters)
+            self._samplers[key] = sampler
+        return sampler
+
+    def clear(self):
+        self._samplers.clear()
+
+    def __len__(self):
+        return len(self._samplers)
+
+
+# samplers can't be shared between contexts
+sampler_cache = PerContext(SamplerCache)
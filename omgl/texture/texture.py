@@ -1,10 +1,20 @@
 from __future__ import absolute_import
+import ctypes
+import weakref
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from OpenGL import GL
 from OpenGL.GL.ARB import texture_rg
+from OpenGL.GL.ARB import bindless_texture
+from OpenGL.raw.GL.VERSION import GL_1_0 as raw_gl
 import numpy as np
 from .. import dtypes
+from .. import features
+from ..counters import counters
 from ..proxy import Proxy, Integer32Proxy
 from ..object import ManagedObject, BindableObject, DescriptorMixin
+from .mipmaps import generate_mipmaps, mipmap_count
+from .units import texture_units
 try:
     from PIL import Image
 except:
@@ -35,7 +45,11 @@ class TextureUnitProxy(Integer32Proxy):
         return [GL.GL_TEXTURE0 + value]
 
 class TextureProxy(Proxy):
-    def __init__(self, property, **kwargs):
+    """Texture parameter proxy.
+
+    Uses direct state access when available, which doesn't bind the texture.
+    """
+    def __init__(self, property, dsa_getter=None, dsa_setter=None, count=1, **kwargs):
         super(TextureProxy, self).__init__(
             getter_args=[property],
             setter_args=[property],
@@ -43,22 +57,56 @@ class TextureProxy(Proxy):
             bind=True,
             **kwargs
         )
+        self._property = property
+        self._dsa_getter = dsa_getter
+        self._dsa_setter = dsa_setter
+        self._count = count
+
+    def __get__(self, obj, cls):
+        if not features.direct_state_access:
+            return super(TextureProxy, self).__get__(obj, cls)
+
+        # GL 4.5
+        # integer parameters are returned as GLint
+        dtype = np.float32 if self._dtype == np.float32 else np.int32
+        value = np.empty(self._count, dtype=dtype)
+        self._dsa_getter(obj.handle, self._property, value)
+        return self._get_result(value)
+
+    def __set__(self, obj, value):
+        if not features.direct_state_access:
+            return super(TextureProxy, self).__set__(obj, value)
+
+        # GL 4.5
+        # replace the target with the texture's handle
+        data = np.array(value, dtype=self._dtype)
+        args = self._set_args(obj, data)
+        self._dsa_setter(obj.handle, *args[1:])
 
 class Integer32TextureProxy(TextureProxy):
-    def __init__(self, property):
+    def __init__(self, property, count=1):
+        # vector parameters use the array setters
+        vector = count > 1
         super(Integer32TextureProxy, self).__init__(
             property,
             getter=GL.glGetTexParameteriv,
-            setter=GL.glTexParameteri,
+            setter=GL.glTexParameteriv if vector else GL.glTexParameteri,
+            dsa_getter=GL.glGetTextureParameteriv,
+            dsa_setter=GL.glTextureParameteriv if vector else GL.glTextureParameteri,
+            count=count,
             dtype=np.int32,
         )
 
 class Float32TextureProxy(TextureProxy):
-    def __init__(self, property):
+    def __init__(self, property, count=1):
+        vector = count > 1
         super(Float32TextureProxy, self).__init__(
             property,
             getter=GL.glGetTexParameterfv,
-            setter=GL.glTexParameterf,
+            setter=GL.glTexParameterfv if vector else GL.glTexParameterf,
+            dsa_getter=GL.glGetTextureParameterfv,
+            dsa_setter=GL.glTextureParameterfv if vector else GL.glTextureParameterf,
+            count=count,
             dtype=np.float32,
         )
 
@@ -118,6 +166,9 @@ class SwizzleProxy(TextureProxy):
             GL.GL_TEXTURE_SWIZZLE_RGBA,
             getter=GL.glGetTexParameteriv,
             setter=GL.glTexParameteriv,
+            dsa_getter=GL.glGetTextureParameteriv,
+            dsa_setter=GL.glTextureParameteriv,
+            count=4,
             dtype=np.uint32,
         )
 
@@ -143,10 +194,14 @@ class ActiveUnitMetaClass(type):
 
 class Texture(DescriptorMixin, BindableObject, ManagedObject):
     __metaclass__ = ActiveUnitMetaClass
+    _bindless_handle = None
+    _sampler_handles = None
 
     _create_func = GL.glGenTextures
+    _dsa_create_func = GL.glCreateTextures
     _delete_func = GL.glDeleteTextures
     _bind_func = GL.glBindTexture
+    _label_identifier = GL.GL_TEXTURE
 
     max_units = Integer32Proxy(GL.GL_MAX_COMBINED_TEXTURE_IMAGE_UNITS)
     active_unit = TextureUnitProxy()
@@ -164,7 +219,7 @@ class Texture(DescriptorMixin, BindableObject, ManagedObject):
     mipmap_base_level = Integer32TextureProxy(GL.GL_TEXTURE_BASE_LEVEL)
     mipmap_max_level = Integer32TextureProxy(GL.GL_TEXTURE_MAX_LEVEL)
 
-    border_color = Float32TextureProxy(GL.GL_TEXTURE_BORDER_COLOR)
+    border_color = Float32TextureProxy(GL.GL_TEXTURE_BORDER_COLOR, count=4)
 
     compare_mode = Integer32TextureProxy(GL.GL_TEXTURE_COMPARE_MODE)
     compare_func = Integer32TextureProxy(GL.GL_TEXTURE_COMPARE_FUNC)
@@ -233,8 +288,93 @@ class Texture(DescriptorMixin, BindableObject, ManagedObject):
         except KeyError as e:
             raise ValueError(e.message)
 
+    def bind(self):
+        # this changes the binding of the active unit behind the unit table's back
+        texture_units.invalidate()
+        super(Texture, self).bind()
+
+    def unbind(self):
+        texture_units.invalidate()
+        super(Texture, self).unbind()
+
+    def _destroy(self):
+        # deleted textures are unbound from every unit
+        try:
+            texture_units.invalidate()
+        except:
+            pass
+        try:
+            self._release_bindless_handles()
+        except:
+            pass
+        super(Texture, self)._destroy()
+
+    def _release_bindless_handles(self):
+        # handles must be made non-resident before the texture is deleted
+        if self._bindless_handle is not None:
+            bindless_texture.glMakeTextureHandleNonResidentARB(self._bindless_handle)
+            self._bindless_handle = None
+
+        if self._sampler_handles:
+            for sampler, handle in list(self._sampler_handles.items()):
+                # deleted samplers have already released their handles
+                if handle in sampler._bindless_handles:
+                    sampler._bindless_handles.discard(handle)
+                    bindless_texture.glMakeTextureHandleNonResidentARB(handle)
+            self._sampler_handles.clear()
+
+    def bindless_handle(self, sampler=None):
+        """Returns a resident ARB_bindless_texture handle for the texture, combined
+        with the sampler's parameters if provided.
+
+        The parameters of the texture, and sampler, can't be changed once a handle exists.
+        Handles are made non-resident when the texture, or sampler, is deleted.
+        """
+        if sampler is None:
+            if self._bindless_handle is None:
+                handle = bindless_texture.glGetTextureHandleARB(self._handle)
+                bindless_texture.glMakeTextureHandleResidentARB(handle)
+                self._bindless_handle = handle
+            return self._bindless_handle
+
+        # samplers are held weakly, so cached handles don't keep them alive
+        if self._sampler_handles is None:
+            self._sampler_handles = weakref.WeakKeyDictionary()
+
+        handle = self._sampler_handles.get(sampler)
+        if handle is None:
+            handle = bindless_texture.glGetTextureSamplerHandleARB(self._handle, sampler.handle)
+            bindless_texture.glMakeTextureHandleResidentARB(handle)
+            self._sampler_handles[sampler] = handle
+            sampler._bindless_handles.add(handle)
+        return handle
+
+    @property
+    def target(self):
+        return self._target
+
+
+# unsized formats can't be used for immutable storage
+_unsized_formats = set([
+    GL.GL_RED,
+    texture_rg.GL_RG,
+    GL.GL_RGB,
+    GL.GL_RGBA,
+    GL.GL_RED_INTEGER,
+    texture_rg.GL_RG_INTEGER,
+    GL.GL_RGB_INTEGER,
+    GL.GL_RGBA_INTEGER,
+    GL.GL_DEPTH_COMPONENT,
+    GL.GL_DEPTH_STENCIL,
+])
+
 
 class BasicTexture(Texture):
+    # the number of size dimensions that are mipmapped
+    # None is all of them, array layers aren't mipmapped
+    _mipmap_dimensions = None
+    _immutable_storage = False
+    _readback = None
     _pil_formats = {
         'RGB':  GL.GL_RGB,
         'RGBA': GL.GL_RGBA,
@@ -267,40 +407,103 @@ class BasicTexture(Texture):
         'LA':   'rrrg',
     }
 
+    # the modes used for each channel count when an image must be converted
+    _pil_channel_modes = {
+        1:  'L',
+        2:  'LA',
+        3:  'RGB',
+        4:  'RGBA',
+    }
+
     @classmethod
-    def open(cls, filename, flip=True, **kwargs):
-        if not Image:
-            raise ValueError('PIL not installed')
+    def open(cls, filename, flip=True, cache=None, **kwargs):
+        """Opens an image file.
 
-        image = Image.open(filename)
-        if flip:
-            image = image.transpose(Image.FLIP_TOP_BOTTOM)
-        obj = cls(image, **kwargs)
-        return obj
+        If mipmap is a dict of generate_mipmaps options, the mipmaps are generated
+        on the CPU, and cached with the image if a TextureCache is provided.
+        """
+        mipmap = kwargs.get('mipmap')
+        data, swizzle = _decode_image((filename, flip, cache, mipmap if isinstance(mipmap, dict) else None))
+        return cls._from_decoded(data, swizzle, kwargs)
+
+    @classmethod
+    def open_many(cls, filenames, flip=True, workers=None, processes=False, cache=None, **kwargs):
+        """Opens many images, decoding them concurrently.
+
+        Images are decoded by a pool of worker threads, or processes, and uploaded
+        on the calling thread, which must own the GL context, as they are decoded.
+        CPU mipmaps, requested as for open, are also generated by the workers.
+        Returns a list of textures in the order of filenames.
+        """
+        mipmap = kwargs.get('mipmap')
+        mipmap = mipmap if isinstance(mipmap, dict) else None
+        textures = []
+        for data, swizzle in decode_images(filenames, flip=flip, workers=workers, processes=processes, cache=cache, mipmap=mipmap):
+            textures.append(cls._from_decoded(data, swizzle, kwargs))
+        return textures
+
+    @classmethod
+    def _from_decoded(cls, data, swizzle, kwargs):
+        properties = dict(kwargs)
+        properties['swizzle'] = properties.get('swizzle') or swizzle
+        if isinstance(properties.get('mipmap'), dict):
+            # the levels have already been generated
+            del properties['mipmap']
+            return cls.from_levels(data, **properties)
+        return cls(data, **properties)
 
     @classmethod
-    def _process_image(cls, image):
-        # some TIFF images don't render correctly
-        # if we convert them to RGBX they suddenly
-        # begin rendering correctly
-        # so let's do that
-        # some TIFF images can't be converted
-        # this may throw an IOError exception
-        # handle unsupported formats
-        # convert from unsupported formats to RGBX
-        image = image.convert('RGBX')
-
-        return image
+    def from_levels(cls, levels, **kwargs):
+        """Creates a texture from a list of mipmap levels, level 0 first,
+        such as those returned by generate_mipmaps.
+
+        A partial chain sets the texture's maximum level, so it's still complete.
+        """
+        kwargs['mipmap'] = False
+        texture = cls(levels[0], levels=len(levels), **kwargs)
+        texture.set_levels(levels[1:], start=1)
+        return texture
 
     @classmethod
-    def _image_to_np_array(cls, image):
+    def _process_image(cls, image, channels=None):
+        # keep the channels of modes that can be uploaded directly
+        # grey scale images are expanded by the texture's swizzle
+        if channels:
+            mode = cls._pil_channel_modes[channels]
+        elif image.mode in cls._pil_dtypes and image.mode not in ('1', 'I'):
+            return image
+        elif image.mode == '1':
+            mode = 'L'
+        elif image.mode.startswith('I'):
+            # integer textures can't be filtered, use floats for 16 and 32 bit images
+            mode = 'F'
+        elif image.mode == 'P':
+            mode = 'RGBA' if 'transparency' in image.info else 'RGB'
+        else:
+            # other modes, such as CMYK and YCbCr
+            mode = 'RGBA'
+
+        if image.mode == mode:
+            return image
+        return image.convert(mode)
+
+    @classmethod
+    def _image_to_np_array(cls, image, flip=False):
         dtype = cls._pil_dtypes.get(image.mode, dtypes.uint8)
         data = np.asarray(image, dtype=dtype.dtype)
+        if flip:
+            # rows are stored top to bottom, OpenGL expects bottom to top
+            data = data[::-1]
+        data = np.ascontiguousarray(data)
         data.shape = (image.size[0], image.size[1], -1)
 
         return data
 
-    def __init__(self, data=None, shape=None, dtype=None, internal_format=None, format=None, level=0, mipmap=True, **properties):
+    def __init__(self, data=None, shape=None, dtype=None, internal_format=None, format=None, level=0, mipmap=True, levels=None, label=None, **properties):
+        """Mipmap is True to generate mipmaps with OpenGL, or a dict of generate_mipmaps
+        options, such as {'filter': 'kaiser', 'srgb': True}, to generate them on the CPU.
+        Levels is the number of levels to allocate, all of them by default when mipmapped.
+        """
         super(Texture, self).__init__()
 
         if Image and isinstance(data, Image.Image):
@@ -331,6 +534,15 @@ class BasicTexture(Texture):
 
         self._size = self._shape[:-1]
 
+        mipmap_levels = None
+        if isinstance(mipmap, dict):
+            if data is None:
+                raise ValueError('CPU mipmaps require data')
+            mipmap_levels = generate_mipmaps(data, levels=levels, dimensions=self._mipmap_dimensions, **mipmap)
+            levels = len(mipmap_levels)
+            mipmap = False
+        self._levels = levels or (self.level_count(self._size) if mipmap else 1)
+
         level = 0
         border = 0
         args = [self._target, level, self._internal_format,]
@@ -346,31 +558,70 @@ class BasicTexture(Texture):
             if v:
                 setattr(self, k, v)
 
-        with self:
-            self._set(*args)
+        if self._immutable:
+            self._allocate_storage()
+            if data is not None:
+                self.set_data(data, format=self._format)
+        else:
+            GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+            with self:
+                self._set(*args)
+
+            if counters.enabled and data is not None:
+                counters.add('bytes_uploaded', data.nbytes, label=self.__class__.__name__)
 
         if mipmap:
             self.mipmap()
+        elif mipmap_levels:
+            self.set_levels(mipmap_levels[1:], start=1)
 
-    def get_data(self, level=0):
-        data_type = dtypes.for_dtype(np.int8)
+        if label:
+            self.label = label
 
-        with self:
-            # BUG: PyOpenGL doesn't support GL_RG or GL_RG_INTEGER here
-            # we have to get the red and green components individually
-            if self._format in [texture_rg.GL_RG, texture_rg.GL_RG_INTEGER,]:
-                red_enum = GL.GL_RED_INTEGER if self._format == texture_rg.GL_RG_INTEGER else GL.GL_RED
-                green_enum = GL.GL_GREEN_INTEGER if self._format == texture_rg.GL_RG_INTEGER else GL.GL_GREEN
-
-                red = GL.glGetTexImage(self._target, level, red_enum, data_type.gl_enum, outputType=np.ndarray)
-                green = GL.glGetTexImage(self._target, level, green_enum, data_type.gl_enum, outputType=np.ndarray)
-                data = np.empty_like(self._npdata)
-                data[...,0] = red
-                data[...,1] = green
-            else:
-                data = GL.glGetTexImage(self._target, level, self._format, data_type.gl_enum, outputType=np.ndarray)
+    @classmethod
+    def level_count(cls, size):
+        """Returns the number of mipmap levels for a texture of size, down to 1x1.
+        """
+        return mipmap_count(size, cls._mipmap_dimensions)
+
+    @property
+    def _immutable(self):
+        # GL 4.2
+        return (
+            getattr(self, '_immutable_set', None) is not None
+            and self._internal_format not in _unsized_formats
+            and bool(features.immutable_storage)
+        )
+
+    def _allocate_storage(self):
+        # allocate every level once, the storage can't be resized later
+        if features.direct_state_access:
+            # GL 4.5
+            self._dsa_immutable_set(self._handle, self._levels, self._internal_format, *self._size)
+        else:
+            with self:
+                self._immutable_set(self._target, self._levels, self._internal_format, *self._size)
+        self._immutable_storage = True
+
+    def get_data(self, level=0):
+        data_type = dtypes.for_dtype(self._dtype)
+        # read rows without padding, to match numpy arrays
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+
+        # read directly into an array of the level's size
+        # this also handles GL_RG without reading each channel separately
+        data = np.empty(self.level_size(level) + [self._shape[-1]], dtype=data_type.dtype)
+        if features.direct_state_access:
+            # GL 4.5
+            GL.glGetTextureImage(self._handle, level, self._format, data_type.gl_enum, data.nbytes, data)
+        else:
+            # PyOpenGL's wrapper doesn't support GL_RG or 3D targets, so use the raw function
+            with self:
+                raw_gl.glGetTexImage(self._target, level, self._format, data_type.gl_enum, ctypes.c_void_p(data.ctypes.data))
 
         data = data.view(dtype=self._dtype)
+        if counters.enabled:
+            counters.add('bytes_read', data.nbytes, label=self.__class__.__name__)
         return data
 
     def set_data(self, data, format=None, offset=None, level=0):
@@ -380,8 +631,8 @@ class BasicTexture(Texture):
             if self._target != GL.GL_TEXTURE_2D:
                 raise ValueError('Must use Texture2D for PIL images')
 
-            image = data
-            image = self._process_image(data)
+            # match the texture's channels
+            image = self._process_image(data, channels=self._shape[-1])
             data = self._image_to_np_array(image)
 
         format = format or self.infer_format(data.shape, data.dtype)
@@ -391,19 +642,131 @@ class BasicTexture(Texture):
         args = [self._target, level,]
         args += offset + list(data.shape[:-1])
         args += [format, data_type.gl_enum, data,]
+        self._set_sub_image(args)
 
-        with self:
-            self._sub_set(*args)
+        if counters.enabled:
+            counters.add('bytes_uploaded', data.nbytes, label=self.__class__.__name__)
 
+    def set_levels(self, levels, start=0, format=None):
+        """Uploads a list of mipmap levels, starting at level start.
+        """
+        for level, data in enumerate(levels, start):
+            if level >= self._levels:
+                raise ValueError('Texture has {} levels'.format(self._levels))
+
+            if self._immutable_storage or level == 0:
+                self.set_data(data, format=format, level=level)
+            else:
+                # mutable storage allocates each level when it's first set
+                data_type = dtypes.for_dtype(data.dtype)
+                args = [self._target, level, self._internal_format,]
+                args += self.level_size(level)
+                args += [0, format or self._format, data_type.gl_enum, data]
+                GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+                with self:
+                    self._set(*args)
+
+                if counters.enabled:
+                    counters.add('bytes_uploaded', data.nbytes, label=self.__class__.__name__)
+
+        # levels past the end of a partial chain would leave the texture incomplete
+        last = start + len(levels) - 1
+        if levels and last < self.level_count(self._size) - 1:
+            self.mipmap_max_level = last
+
+    def set_data_from_buffer(self, buffer, shape, dtype, buffer_offset=0, format=None, offset=None, level=0):
+        """Updates the texture from data of shape and dtype in a PixelUnpackBuffer,
+        starting buffer_offset bytes into the buffer.
+
+        The copy is performed by the GPU, so this doesn't wait for the data to be read.
+        """
+        format = format or self.infer_format(shape, dtype)
+        offset = offset or [0 for _ in self.size]
+        data_type = dtypes.for_dtype(np.dtype(dtype))
+
+        # the data pointer is an offset into the bound unpack buffer
+        args = [self._target, level,]
+        args += offset + list(shape[:-1])
+        args += [format, data_type.gl_enum, ctypes.c_void_p(buffer_offset),]
+        with buffer:
+            self._set_sub_image(args)
+
+    def get_data_into_buffer(self, buffer, buffer_offset=0, level=0):
+        """Reads a level of the texture into a PixelPackBuffer, starting
+        buffer_offset bytes into the buffer.
+
+        The copy is performed by the GPU, so this doesn't wait for rendering to finish.
+        """
+        data_type = dtypes.for_dtype(np.dtype(self._dtype))
+        nbytes = self.level_nbytes(level)
+
+        # the data pointer is an offset into the bound pack buffer
+        # the raw function is used as PyOpenGL's wrapper allocates an array
+        pointer = ctypes.c_void_p(buffer_offset)
+        with buffer:
+            if features.direct_state_access:
+                # GL 4.5
+                GL.glGetTextureImage(self._handle, level, self._format, data_type.gl_enum, nbytes, pointer)
+            else:
+                with self:
+                    raw_gl.glGetTexImage(self._target, level, self._format, data_type.gl_enum, pointer)
+        return nbytes
+
+    def read_async(self, level=0, out=None, readback=None):
+        """Reads a level of the texture without waiting for rendering to finish.
+
+        Returns a ReadbackFuture, whose result is the data, read into out if provided.
+        By default, the texture keeps a ReadbackRing with room for a few reads of level 0.
+        """
+        if readback is None:
+            if self._readback is None:
+                from ..buffer.readback import ReadbackRing
+                self._readback = ReadbackRing(self.level_nbytes(0))
+            readback = self._readback
+        return readback.read_texture(self, level=level, out=out)
+
+    def _set_sub_image(self, args):
+        # numpy arrays are tightly packed, rows aren't padded to 4 bytes
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+        if features.direct_state_access:
+            # GL 4.5
+            # replace the target with the texture's handle
+            self._dsa_sub_set(self._handle, *args[1:])
+        else:
+            with self:
+                self._sub_set(*args)
 
     def mipmap(self):
-        with self:
-            GL.glGenerateMipmap(self._target)
+        if features.direct_state_access:
+            GL.glGenerateTextureMipmap(self._handle)
+        else:
+            with self:
+                GL.glGenerateMipmap(self._target)
 
     @property
     def internal_format(self):
         return self._internal_format
 
+    def level_size(self, level):
+        """Returns the size of a mipmap level, array layers aren't reduced.
+        """
+        dimensions = len(self._size) if self._mipmap_dimensions is None else self._mipmap_dimensions
+        return [max(1, s >> level) if i < dimensions else s for i, s in enumerate(self._size)]
+
+    def level_nbytes(self, level):
+        """Returns the number of bytes in a mipmap level.
+        """
+        size = self.level_size(level) + [self._shape[-1]]
+        return np.dtype(self._dtype).itemsize * reduce(lambda x,y: x*y, size, 1)
+
+    @property
+    def levels(self):
+        return self._levels
+
+    @property
+    def immutable_storage(self):
+        return self._immutable_storage
+
     @property
     def size(self):
         return self._size
@@ -425,10 +788,62 @@ class BasicTexture(Texture):
         self.set_data(value)
 
 
+def decode_image(filename, flip=True):
+    """Decodes an image file into an array with the image's channels.
+
+    Returns the array and the swizzle used to display it, such as 'rrr1' for grey scale images.
+    OpenGL isn't used, so this can be called from other threads and processes.
+    """
+    if not Image:
+        raise ValueError('PIL not installed')
+
+    image = BasicTexture._process_image(Image.open(filename))
+    data = BasicTexture._image_to_np_array(image, flip=flip)
+    return data, BasicTexture._pil_swizzles.get(image.mode)
+
+def decode_levels(filename, flip=True, **options):
+    """Decodes an image file and generates its mipmaps on the CPU.
+
+    Returns a list of levels, level 0 first, and the swizzle, options are passed to generate_mipmaps.
+    """
+    data, swizzle = decode_image(filename, flip=flip)
+    return generate_mipmaps(data, **options), swizzle
+
+def _decode_image(args):
+    # pools pass a single argument
+    filename, flip, cache, mipmap = args
+    if mipmap is not None:
+        if cache is not None:
+            return cache.load_levels(filename, flip=flip, **mipmap)
+        return decode_levels(filename, flip=flip, **mipmap)
+    if cache is not None:
+        return cache.load_image(filename, flip=flip)
+    return decode_image(filename, flip=flip)
+
+def decode_images(filenames, flip=True, workers=None, processes=False, cache=None, mipmap=None):
+    """Decodes image files concurrently, yielding (data, swizzle) in the order of filenames.
+
+    A thread pool is used by default, as PIL releases the GIL while decoding.
+    Processes avoid the GIL entirely, at the cost of copying each array back.
+    Workers defaults to the number of CPUs.
+    Images are loaded from, and stored in, the TextureCache cache if provided.
+    If mipmap is a dict of generate_mipmaps options, each image's list of levels is
+    yielded instead of its data.
+    """
+    pool = (multiprocessing.Pool if processes else ThreadPool)(workers)
+    try:
+        for result in pool.imap(_decode_image, [(filename, flip, cache, mipmap) for filename in filenames]):
+            yield result
+    finally:
+        pool.terminate()
+
+
 class Texture1D_Mixin(object):
     _set = GL.glTexImage1D
     _immutable_set = GL.glTexStorage1D
+    _dsa_immutable_set = GL.glTextureStorage1D
     _sub_set = GL.glTexSubImage1D
+    _dsa_sub_set = GL.glTextureSubImage1D
 
     wrap_s = Integer32TextureProxy(GL.GL_TEXTURE_WRAP_S)
 
@@ -440,7 +855,9 @@ class Texture1D_Mixin(object):
 class Texture2D_Mixin(object):
     _set = GL.glTexImage2D
     _immutable_set = GL.glTexStorage2D
+    _dsa_immutable_set = GL.glTextureStorage2D
     _sub_set = GL.glTexSubImage2D
+    _dsa_sub_set = GL.glTextureSubImage2D
 
     wrap_s = Integer32TextureProxy(GL.GL_TEXTURE_WRAP_S)
     wrap_t = Integer32TextureProxy(GL.GL_TEXTURE_WRAP_T)
@@ -457,7 +874,9 @@ class Texture2D_Mixin(object):
 class Texture3D_Mixin(object):
     _set = GL.glTexImage3D
     _immutable_set = GL.glTexStorage3D
+    _dsa_immutable_set = GL.glTextureStorage3D
     _sub_set = GL.glTexSubImage3D
+    _dsa_sub_set = GL.glTextureSubImage3D
 
     wrap_s = Integer32TextureProxy(GL.GL_TEXTURE_WRAP_S)
     wrap_t = Integer32TextureProxy(GL.GL_TEXTURE_WRAP_T)
@@ -476,23 +895,79 @@ class Texture3D_Mixin(object):
         return self.shape[2]
 
 
+class Layered_Mixin(object):
+    """Textures whose last size dimension is made of layers,
+    array layers or the slices of 3D textures.
+
+    Stacks of layers have the shape (layers,) + the shape of a layer's data.
+    """
+    @classmethod
+    def from_layers(cls, layers, staging_nbytes=64 * 1024 * 1024, mipmap=True, **kwargs):
+        """Creates a texture from a stack of layers, such as a list of images or a memory mapped volume.
+
+        Layers are uploaded in slabs of at most staging_nbytes, or a single layer,
+        so only one slab of a memory mapped volume is read into memory at a time.
+        """
+        first = np.asarray(layers[0])
+        count = len(layers)
+        shape = first.shape[:-1] + (count,) + first.shape[-1:]
+        kwargs['format'] = kwargs.get('format') or cls.infer_format(first.shape, first.dtype)
+        if isinstance(mipmap, dict):
+            raise ValueError('CPU mipmaps require data')
+        # the mipmaps are generated once, after the layers are uploaded
+        kwargs['levels'] = kwargs.get('levels') or (cls.level_count(shape[:-1]) if mipmap else 1)
+        texture = cls(shape=shape, dtype=first.dtype, mipmap=False, **kwargs)
+
+        step = max(1, staging_nbytes // max(1, first.nbytes))
+        for start in range(0, count, step):
+            slab = np.ascontiguousarray(layers[start:start + step], dtype=first.dtype)
+            texture.set_layers(start, slab, format=kwargs['format'])
+
+        if mipmap:
+            texture.mipmap()
+        return texture
+
+    def set_layers(self, start, data, level=0, format=None):
+        """Updates consecutive layers, beginning at start, from a stack of layers.
+        """
+        data = np.ascontiguousarray(data)
+        # stacks are stored layer by layer, which is the order OpenGL expects
+        shape = data.shape[1:-1] + data.shape[:1] + data.shape[-1:]
+        offset = [0 for _ in self.size[:-1]] + [start]
+        self.set_data(data.reshape(shape), format=format, offset=offset, level=level)
+
+    def set_layer(self, layer, data, level=0, format=None):
+        """Updates a single layer.
+        """
+        data = np.asarray(data)
+        self.set_layers(layer, data.reshape((1,) + data.shape), level=level, format=format)
+
+    @property
+    def layers(self):
+        return self.size[-1]
+
+
 class Texture1D(Texture1D_Mixin, BasicTexture):
     _target = GL.GL_TEXTURE_1D
 
 class Texture2D(Texture2D_Mixin, BasicTexture):
     _target = GL.GL_TEXTURE_2D
 
-class Texture3D(Texture3D_Mixin, BasicTexture):
+class Texture3D(Layered_Mixin, Texture3D_Mixin, BasicTexture):
     _target = GL.GL_TEXTURE_3D
 
-class TextureArray1D(Texture2D_Mixin, BasicTexture):
+class TextureArray1D(Layered_Mixin, Texture2D_Mixin, BasicTexture):
     _target = GL.GL_TEXTURE_1D_ARRAY
+    _mipmap_dimensions = 1
 
-class TextureArray2D(Texture3D_Mixin, BasicTexture):
-    _target = GL.GL_TEXTURE_2D
+class TextureArray2D(Layered_Mixin, Texture3D_Mixin, BasicTexture):
+    _target = GL.GL_TEXTURE_2D_ARRAY
+    _mipmap_dimensions = 2
 
 class RectangularTexture(Texture2D_Mixin, BasicTexture):
     _target = GL.GL_TEXTURE_RECTANGLE
+    # rectangular textures can't be mipmapped
+    _mipmap_dimensions = 0
 
 class BufferTexture(Texture):
     _target = GL.GL_TEXTURE_BUFFER
@@ -0,0 +1,84 @@
+from __future__ import absolute_import
+from OpenGL import GL
+from .. import features
+from ..counters import counters
+from ..context import PerContext
+
+
+class TextureUnits(object):
+    """Tracks the texture and sampler bound to each texture unit, so textures
+    that are already bound aren't bound again.
+
+    Pipelines bind their textures through the table, and leave them bound
+    after rendering, so consecutive draws with the same textures don't re-bind them.
+
+    Binding textures or samplers without the table, such as with Texture.bind,
+    and deleting them, invalidates the table.
+    """
+    def __init__(self):
+        self._textures = {}
+        self._samplers = {}
+
+    def bind(self, unit, texture, sampler=None):
+        """Binds the texture, and sampler if provided, to the unit.
+
+        Units without a sampler use the texture's own parameters.
+        """
+        key = (texture.target, texture.handle)
+        if self._textures.get(unit) != key:
+            if counters.enabled:
+                counters.add('binds', label=getattr(texture.target, 'name', None) or texture.__class__.__name__)
+
+            if features.direct_state_access:
+                # GL 4.5
+                GL.glBindTextureUnit(unit, texture.handle)
+            else:
+                GL.glActiveTexture(GL.GL_TEXTURE0 + unit)
+                GL.glBindTexture(texture.target, texture.handle)
+            self._textures[unit] = key
+
+        # unknown units may have a sampler bound, so are always set
+        handle = sampler.handle if sampler is not None else 0
+        if self._samplers.get(unit) != handle:
+            GL.glBindSampler(unit, handle)
+            self._samplers[unit] = handle
+
+    def unbind(self, unit):
+        """Unbinds the texture and sampler bound to the unit by the table.
+        """
+        key = self._textures.pop(unit, None)
+        if key is not None:
+            if features.direct_state_access:
+                GL.glBindTextureUnit(unit, 0)
+            else:
+                GL.glActiveTexture(GL.GL_TEXTURE0 + unit)
+                GL.glBindTexture(key[0], 0)
+
+        if self._samplers.pop(unit, 0):
+            GL.glBindSampler(unit, 0)
+
+    def unbind_sampler(self, unit):
+        """Unbinds the sampler bound to the unit, leaving the texture bound.
+        """
+        if self._samplers.get(unit) != 0:
+            GL.glBindSampler(unit, 0)
+            self._samplers[unit] = 0
+
+    def unbind_all(self):
+        for unit in set(self._textures) | set(self._samplers):
+            self.unbind(unit)
+
+    def invalidate(self):
+        """Forgets the bound textures, the next bind of each unit is always performed.
+        """
+        self._textures.clear()
+        self._samplers.clear()
+
+    def __getitem__(self, unit):
+        """Returns the (target, handle) bound to the unit by the table, or None.
+        """
+        return self._textures.get(unit)
+
+
+# bindings are per context
+texture_units = PerContext(TextureUnits)
@@ -46,7 +46,9 @@ setup(
         'omgl.buffer',
         'omgl.mesh',
         'omgl.pipeline',
+        'omgl.query',
         'omgl.shader',
+        'omgl.sync',
         'omgl.texture',
     ],
     classifiers=[